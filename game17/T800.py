@@ -1,6 +1,6 @@
 import numpy as np
 
-from game17 import find_owned_pieces, destination
+from game17 import find_owned_pieces, neighbour_table
 
 
 def zombie_strategy(neighbours, count):
@@ -16,7 +16,8 @@ def zombie_strategy(neighbours, count):
     return p
 
 
-def make_moves(owner, rounds_left, owners, numbers):
+def make_moves(owner, rounds_left, owners, numbers, view=None,
+               rng=np.random):
     """
     A slightly smarter zombie.
 
@@ -30,6 +31,10 @@ def make_moves(owner, rounds_left, owners, numbers):
         Current owner of each square.
     numbers : square array of ints
         Current number of pieces in each square.
+    view : GameView, optional
+        Cached features of the current board.
+    rng : numpy Generator or RandomState, optional
+        Source of randomness. The default is numpy.random.
 
     Returns
     -------
@@ -41,13 +46,18 @@ def make_moves(owner, rounds_left, owners, numbers):
 
     """
     board_size = numbers.shape[0]
+    if view is None:
+        neighbour_numbers = numbers.reshape(-1)[neighbour_table(board_size)]
+        owned_pieces = find_owned_pieces(owner, owners, numbers)
+    else:
+        neighbour_numbers = view.neighbour_numbers()
+        owned_pieces = view.owned_pieces(owner)
     moves = []
-    for i, j, count in find_owned_pieces(owner, owners, numbers):
-        neighbours = [numbers[tuple(destination((i, j), d, board_size))]
-                      for d in 'nsew']
+    for i, j, count in owned_pieces:
+        neighbours = neighbour_numbers[i * board_size + j]
         p = zombie_strategy(neighbours, count)
         if p.sum() > 0:
-            to_move = np.random.multinomial(count, p)
+            to_move = rng.multinomial(count, p)
             for k in range(4):
                 if to_move[k] > 0:
                     move = ((i, j), 'nsew'[k], to_move[k])
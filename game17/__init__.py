@@ -1,11 +1,17 @@
 from .game_runners import (
         replay, single, round_robin, battle_royale, vs_zombies)
 from .basic_mover import get_mover_factory
-from .game17 import find_owned_pieces, destination, update_board, create_board
+from .external_mover import get_external_mover_factory
+from .simulation import SimulationBoard
+from .game17 import (
+        find_owned_pieces, destination, update_board, create_board,
+        moves_to_array, neighbour_table)
 
 __version__ = "1.0"
 
 
 __all__ = ['replay', 'single', 'round_robin', 'battle_royale', 'vs_zombies',
-           'get_mover_factory', 'find_owned_pieces', 'destination',
-           'update_board', 'create_board']
+           'get_mover_factory', 'get_external_mover_factory',
+           'find_owned_pieces', 'destination',
+           'update_board', 'create_board', 'moves_to_array',
+           'neighbour_table', 'SimulationBoard']
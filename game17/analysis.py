@@ -0,0 +1,175 @@
+"""
+Headless analysis of stored game records.
+
+Records are read one game at a time, each round's diffs are applied in one
+go, and the territory (squares) and pieces of every player at the end of
+every round are written out as a table. Whole tournament directories can be
+processed in parallel without holding more than a few games in memory.
+"""
+
+import json
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import archive
+from .game17 import board_dtypes
+
+COLUMNS = ['game', 'round', 'player', 'squares', 'pieces']
+
+
+def record_sources(paths):
+    """
+    Where to find each game in paths, which may be JSON record files,
+    archives, or directories of them. Yields (path, game id), where the game
+    id is None for JSON files.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from record_sources(sorted(
+                p for p in path.iterdir()
+                if p.suffix in ('.json', archive.SUFFIX)))
+        elif archive.is_archive(path):
+            with archive.ArchiveReader(path) as games:
+                for game_id in games.keys():
+                    yield path, game_id
+        else:
+            yield path, None
+
+
+_readers = {}
+
+
+def load_record(source):
+    'Load the game at source, a (path, game id) pair from record_sources'
+    path, game_id = source
+    if game_id is None:
+        with open(path) as fh:
+            return path.stem, json.load(fh)
+    # keep archives open, as consecutive games usually share one
+    if path not in _readers:
+        _readers[path] = archive.ArchiveReader(path)
+    return game_id, _readers[path][game_id]
+
+
+def iter_records(paths):
+    """
+    Load game records one at a time.
+
+    Parameters
+    ----------
+    paths : iterable of str or Path
+        Record files, archives, or directories of them.
+
+    Yields
+    ------
+    game : str
+        Name of the game (the file name without .json, or its id in an
+        archive).
+    record : game structure
+        Record of the game.
+
+    """
+    for source in record_sources(paths):
+        yield load_record(source)
+
+
+def _apply_diffs(board, diffs):
+    'Apply a list of diffs in order, so later changes win'
+    diffs = [np.asarray(diff, dtype=np.int64).reshape((-1, 3))
+             for diff in diffs]
+    if not diffs:
+        return
+    diff = np.concatenate(diffs)[::-1]
+    squares = diff[:, 0] * board.shape[0] + diff[:, 1]
+    squares, last = np.unique(squares, return_index=True)
+    board.reshape(-1)[squares] = diff[last, 2]
+
+
+def territory(record, game=None):
+    """
+    Squares and pieces held by each player at the end of each round.
+
+    Parameters
+    ----------
+    record : game structure
+        Record of a game.
+    game : str, optional
+        Name of the game, for the game column.
+
+    Returns
+    -------
+    pandas DataFrame
+        One row per round and player still holding squares, with columns
+        game, round, player, squares and pieces.
+
+    """
+    owner_dtype, number_dtype = board_dtypes(len(record['owners']))
+    owners = np.array(record['owners'], dtype=owner_dtype)
+    numbers = np.array(record['numbers'], dtype=number_dtype)
+    rounds = {}
+    for diff in record['diffs']:
+        rounds.setdefault(diff['round'], []).append(diff)
+    tables = []
+    for round, diffs in sorted(rounds.items()):
+        _apply_diffs(owners, [diff['owners'] for diff in diffs])
+        _apply_diffs(numbers, [diff['numbers'] for diff in diffs])
+        players, ix = np.unique(owners, return_inverse=True)
+        tables.append(pd.DataFrame({
+            'game': game,
+            'round': round,
+            'player': players,
+            'squares': np.bincount(ix.ravel(), minlength=len(players)),
+            'pieces': np.bincount(ix.ravel(), numbers.ravel(),
+                                  len(players)).astype(np.int64)}))
+    if not tables:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+def _territory_from_source(source):
+    game, record = load_record(source)
+    return territory(record, game)
+
+
+def analyse(paths, output, processes=None):
+    """
+    Write the territory of every player in every round of every game to a
+    tab separated file, processing games in parallel.
+
+    Parameters
+    ----------
+    paths : iterable of str or Path
+        Record files, archives, or directories of them.
+    output : str, Path or file object
+        Where to write the table.
+    processes : int, optional
+        Number of worker processes. The default is one per CPU. Use 1 to
+        process the games in this process.
+
+    Returns
+    -------
+    int
+        Number of games analysed.
+
+    """
+    if isinstance(output, (str, Path)):
+        with open(output, 'w') as fh:
+            return analyse(paths, fh, processes)
+    output.write('\t'.join(COLUMNS) + '\n')
+    sources = record_sources(paths)
+    if processes == 1:
+        return _write_tables(map(_territory_from_source, sources), output)
+    with Pool(processes) as pool:
+        return _write_tables(
+            pool.imap(_territory_from_source, sources), output)
+
+
+def _write_tables(tables, output):
+    count = 0
+    for table in tables:
+        table.to_csv(output, sep='\t', header=False, index=False)
+        count += 1
+    return count
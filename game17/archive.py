@@ -0,0 +1,180 @@
+"""
+Single-file archives of game records.
+
+An archive holds any number of games, each stored as compressed JSON and
+identified by a game id (eg. 'battle-royale-3' or '1 vs 2'). Games are only
+ever appended, so writing is one sequential stream. Closing an archive
+appends an index of where each game starts, which lets a reader find any
+game without scanning. If a writer dies before closing, the games it
+finished are still recovered by scanning the archive.
+
+Layout:
+
+    b'G17ARCH1'
+    for each game: <id length, uint32> <data length, uint64> <id> <data>
+    <index, compressed JSON of {id: [data offset, data length]}>
+    <index offset, uint64> b'G17INDEX'
+
+All integers are little endian.
+"""
+
+import json
+import mmap
+import struct
+import zlib
+
+from .game17 import NumPyEncoder
+
+MAGIC = b'G17ARCH1'
+INDEX_MAGIC = b'G17INDEX'
+SUFFIX = '.g17'
+_GAME_HEADER = struct.Struct('<IQ')
+_TRAILER = struct.Struct('<Q8s')
+
+
+def is_archive(path):
+    'Whether the file at path is a game archive'
+    try:
+        with open(path, 'rb') as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _read_index(data):
+    """
+    Index of the games in archive data (bytes or mmap), and the offset at
+    which the next game should be written.
+    """
+    if len(data) < len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+        raise ValueError('not a game17 archive')
+    if len(data) >= len(MAGIC) + _TRAILER.size:
+        index_offset, magic = _TRAILER.unpack_from(
+            data, len(data) - _TRAILER.size)
+        if magic == INDEX_MAGIC and index_offset < len(data):
+            index = json.loads(zlib.decompress(
+                data[index_offset:len(data) - _TRAILER.size]))
+            return {k: tuple(v) for k, v in index.items()}, index_offset
+    # no index, so the archive was not closed: recover complete games
+    index = {}
+    offset = len(MAGIC)
+    while offset + _GAME_HEADER.size <= len(data):
+        id_length, data_length = _GAME_HEADER.unpack_from(data, offset)
+        start = offset + _GAME_HEADER.size + id_length
+        if start + data_length > len(data):
+            break
+        game_id = bytes(data[offset + _GAME_HEADER.size:start]).decode()
+        index[game_id] = (start, data_length)
+        offset = start + data_length
+    return index, offset
+
+
+class ArchiveWriter(object):
+    """
+    Append games to an archive.
+
+    Parameters
+    ----------
+    path : str or Path
+        Archive file.
+    mode : str, optional
+        'w' to start a new archive or 'a' to add to an existing one (which
+        is created if it does not exist). The default is 'w'.
+
+    """
+
+    def __init__(self, path, mode='w'):
+        if mode not in ('w', 'a'):
+            raise ValueError(f'unknown mode {mode}')
+        self.path = path
+        self.index = {}
+        try:
+            self._fh = open(path, 'r+b' if mode == 'a' else 'w+b')
+        except FileNotFoundError:
+            self._fh = open(path, 'w+b')
+        self._fh.seek(0, 2)
+        if self._fh.tell() > 0:
+            with mmap.mmap(self._fh.fileno(), 0,
+                           access=mmap.ACCESS_READ) as data:
+                self.index, end = _read_index(data)
+            # drop the old index (or a partly written game) and carry on
+            self._fh.seek(end)
+            self._fh.truncate()
+        else:
+            self._fh.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, game_id):
+        return game_id in self.index
+
+    def write(self, game_id, record):
+        'Append the record of a game'
+        encoded_id = game_id.encode()
+        data = zlib.compress(
+            json.dumps(record, cls=NumPyEncoder).encode(), 1)
+        self._fh.write(_GAME_HEADER.pack(len(encoded_id), len(data)))
+        self._fh.write(encoded_id)
+        self.index[game_id] = (self._fh.tell(), len(data))
+        self._fh.write(data)
+        self._fh.flush()
+
+    def close(self):
+        'Write the index and close the archive'
+        if self._fh.closed:
+            return
+        index_offset = self._fh.tell()
+        self._fh.write(zlib.compress(json.dumps(self.index).encode()))
+        self._fh.write(_TRAILER.pack(index_offset, INDEX_MAGIC))
+        self._fh.close()
+
+
+class ArchiveReader(object):
+    """
+    Read games from an archive, by id or in the order they were written.
+
+    Parameters
+    ----------
+    path : str or Path
+        Archive file.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index, _ = _read_index(self._data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, game_id):
+        return game_id in self.index
+
+    def __getitem__(self, game_id):
+        offset, length = self.index[game_id]
+        return json.loads(zlib.decompress(
+            self._data[offset:offset + length]))
+
+    def keys(self):
+        'Game ids in the order the games were written'
+        return sorted(self.index, key=self.index.get)
+
+    def __iter__(self):
+        'Yields (game id, record) in the order the games were written'
+        for game_id in self.keys():
+            yield game_id, self[game_id]
+
+    def close(self):
+        self._data.close()
@@ -0,0 +1,241 @@
+"""
+Engines for the core of the game: applying moves, finding pieces, diffing
+boards and playing zombie turns.
+
+NumpyBackend is the reference implementation and always available.
+NumbaBackend compiles the same operations into tight loops with Numba, if
+it is installed. Given the same random number generator, both backends play
+exactly the same game.
+"""
+
+import numpy as np
+
+from . import game17 as g17
+from .zombie import make_moves as make_moves_zombie
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+class NumpyBackend(object):
+    'Reference backend built on NumPy'
+
+    name = 'numpy'
+
+    def find_owned_pieces(self, owner, owners, numbers):
+        'See game17.find_owned_pieces'
+        return g17.find_owned_pieces(owner, owners, numbers)
+
+    def update_board(self, owner, moves, owners, numbers, rng=np.random):
+        'See game17.update_board'
+        g17.update_board(owner, moves, owners, numbers, rng)
+
+    def board_diff(self, before, after):
+        'See game17.board_diff'
+        return g17.board_diff(before, after)
+
+    def zombie_turn(self, owner, rounds_left, owners, numbers,
+                    rng=np.random, tie_rng=np.random, view=None):
+        'Choose and apply the moves of the zombie owner'
+        moves = make_moves_zombie(
+            owner, rounds_left, owners, numbers, view=view, rng=rng)
+        self.update_board(owner, moves, owners, numbers, tie_rng)
+
+
+# The kernels below are plain Python so that they can be read and tested
+# without Numba, but they are only fast once NumbaBackend has compiled them.
+
+_OK, _OUT_OF_BOUNDS, _UNOWNED, _OVER_COMMITTED, _NEGATIVE = range(5)
+
+_SKIP_MESSAGES = {
+    _OUT_OF_BOUNDS: 'square coordinates out of bounds',
+    _UNOWNED: 'attempt to move unowned pieces',
+    _OVER_COMMITTED: 'attempt to move more pieces than owned',
+    _NEGATIVE: 'attempt to move a negative number of pieces'}
+
+
+def _owned_squares_kernel(owner, owners, numbers):
+    'Flat indices of the non-empty squares owned by owner, in order'
+    count = 0
+    for k in range(owners.size):
+        if owners[k] == owner and numbers[k] > 0:
+            count += 1
+    squares = np.empty(count, dtype=np.int64)
+    count = 0
+    for k in range(owners.size):
+        if owners[k] == owner and numbers[k] > 0:
+            squares[count] = k
+            count += 1
+    return squares
+
+
+def _tally_kernel(owner, moves, owners, board_size, table, outgoing,
+                  incoming):
+    'Check array moves and total pieces leaving and arriving at each square'
+    for k in range(moves.shape[0]):
+        i, j, direction = moves[k, 0], moves[k, 1], moves[k, 2]
+        if (i < 0 or i >= board_size or j < 0 or j >= board_size or
+                direction < 0 or direction >= 4):
+            return _OUT_OF_BOUNDS
+    for k in range(moves.shape[0]):
+        if owners[moves[k, 0] * board_size + moves[k, 1]] != owner:
+            return _UNOWNED
+    for k in range(moves.shape[0]):
+        square = moves[k, 0] * board_size + moves[k, 1]
+        outgoing[square] += moves[k, 3]
+        incoming[table[square, moves[k, 2]]] += moves[k, 3]
+    return _OK
+
+
+def _resolve_kernel(owner, outgoing, incoming, owners, numbers):
+    """
+    Move the pieces and settle ownership of every square except the ties,
+    whose flat indices are returned for a coin toss.
+    """
+    for k in range(numbers.size):
+        if outgoing[k] > numbers[k]:
+            return _OVER_COMMITTED, np.empty(0, dtype=np.int64)
+    for k in range(numbers.size):
+        if outgoing[k] < 0 or incoming[k] < 0:
+            return _NEGATIVE, np.empty(0, dtype=np.int64)
+    num_ties = 0
+    for k in range(numbers.size):
+        numbers[k] -= outgoing[k]
+        if incoming[k] > 0 and incoming[k] == numbers[k]:
+            num_ties += 1
+    ties = np.empty(num_ties, dtype=np.int64)
+    num_ties = 0
+    for k in range(numbers.size):
+        if incoming[k] > 0:
+            if incoming[k] > numbers[k]:
+                owners[k] = owner
+            elif incoming[k] == numbers[k]:
+                ties[num_ties] = k
+                num_ties += 1
+            numbers[k] += incoming[k]
+    return _OK, ties
+
+
+def _diff_kernel(before, after, board_size, diff):
+    'Fill diff with the changed squares and return how many there are'
+    count = 0
+    for k in range(after.size):
+        if after[k] != before[k]:
+            diff[count, 0] = k // board_size
+            diff[count, 1] = k % board_size
+            diff[count, 2] = after[k]
+            count += 1
+    return count
+
+
+_kernels = {}
+
+
+class NumbaBackend(NumpyBackend):
+    'Backend that runs moves and zombie turns in Numba compiled loops'
+
+    name = 'numba'
+
+    def __init__(self):
+        if numba is None:
+            raise ImportError('the numba backend needs numba installed')
+        if not _kernels:
+            for name, kernel in [('owned_squares', _owned_squares_kernel),
+                                 ('tally', _tally_kernel),
+                                 ('resolve', _resolve_kernel),
+                                 ('diff', _diff_kernel)]:
+                _kernels[name] = numba.njit(cache=True)(kernel)
+
+    def find_owned_pieces(self, owner, owners, numbers):
+        squares = _kernels['owned_squares'](
+            owner, owners.reshape(-1), numbers.reshape(-1))
+        from_i, from_j = np.divmod(squares, owners.shape[0])
+        return np.vstack(
+            (from_i, from_j, numbers.reshape(-1)[squares])).T
+
+    def update_board(self, owner, moves, owners, numbers, rng=np.random):
+        if not (isinstance(moves, np.ndarray) and
+                owners.flags.c_contiguous and numbers.flags.c_contiguous):
+            # lists of tuples need Python to unpack them anyway
+            return g17.update_board(owner, moves, owners, numbers, rng)
+        if moves.size == 0:
+            moves = np.zeros((0, 4), dtype=np.int64)
+        if moves.ndim != 2 or moves.shape[1] != 4:
+            raise ValueError('array moves must have shape (k, 4)')
+        if not np.issubdtype(moves.dtype, np.integer):
+            raise ValueError('array moves must contain integers')
+        outgoing = np.zeros(numbers.size, dtype=np.int64)
+        incoming = np.zeros(numbers.size, dtype=np.int64)
+        status = _kernels['tally'](
+            owner, moves.astype(np.int64, copy=False), owners.reshape(-1),
+            owners.shape[0], g17.neighbour_table(owners.shape[0]),
+            outgoing, incoming)
+        if status == _OK:
+            status, ties = _kernels['resolve'](
+                owner, outgoing, incoming, owners.reshape(-1),
+                numbers.reshape(-1))
+        if status != _OK:
+            print('player %d skipped: %s\n' % (owner, _SKIP_MESSAGES[status]))
+            return
+        # toss coins exactly as game17.update_board does
+        for square in ties:
+            if rng.choice(2):
+                owners.reshape(-1)[square] = owner
+
+    def board_diff(self, before, after):
+        dtype = np.result_type(
+            after.dtype, np.min_scalar_type(after.shape[0]))
+        diff = np.empty((after.size, 3), dtype=dtype)
+        count = _kernels['diff'](
+            before.reshape(-1), after.reshape(-1), after.shape[0], diff)
+        return diff[:count]
+
+    def zombie_turn(self, owner, rounds_left, owners, numbers,
+                    rng=np.random, tie_rng=np.random, view=None):
+        squares = _kernels['owned_squares'](
+            owner, owners.reshape(-1), numbers.reshape(-1))
+        counts = numbers.reshape(-1)[squares]
+        # draw exactly as zombie.make_moves does
+        if isinstance(rng, np.random.Generator) and len(counts):
+            to_move = rng.multinomial(counts, [0.25]*4)
+        else:
+            to_move = np.array([rng.multinomial(count, [0.25]*4)
+                                for count in counts]).reshape((-1, 4))
+        from_square, direction = to_move.nonzero()
+        moves = np.empty((len(from_square), 4), dtype=np.int64)
+        moves[:, 0], moves[:, 1] = np.divmod(
+            squares[from_square], owners.shape[0])
+        moves[:, 2] = direction
+        moves[:, 3] = to_move[from_square, direction]
+        self.update_board(owner, moves, owners, numbers, tie_rng)
+
+
+BACKENDS = {'numpy': NumpyBackend, 'numba': NumbaBackend}
+
+
+def get_backend(backend='numpy'):
+    """
+    Get a game engine backend.
+
+    Parameters
+    ----------
+    backend : str or backend object, optional
+        'numpy', 'numba', or 'auto' (numba if it is installed, otherwise
+        numpy). Backend objects are returned as they are. The default is
+        'numpy'.
+
+    Returns
+    -------
+    backend object
+
+    """
+    if not isinstance(backend, str):
+        return backend
+    if backend == 'auto':
+        backend = 'numpy' if numba is None else 'numba'
+    if backend not in BACKENDS:
+        raise ValueError(f'unknown backend {backend}, should be one of '
+                         + ', '.join(sorted(BACKENDS) + ['auto']))
+    return BACKENDS[backend]()
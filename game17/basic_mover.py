@@ -1,18 +1,29 @@
+from .game_view import accepts_view
+
+
 def get_mover_factory(make_moves):
     'creates a get_mover function for a basic make_moves function'
     def get_mover(owner=None, owners=None, numbers=None,
-                  turn_order=None, num_rounds=None):
-        return BasicMover(make_moves, owner, num_rounds)
+                  turn_order=None, num_rounds=None, view=None):
+        return BasicMover(make_moves, owner, num_rounds, view)
     return get_mover
 
 
 class BasicMover(object):
-    def __init__(self, make_moves, owner, num_rounds):
+    def __init__(self, make_moves, owner, num_rounds, view=None):
         self.make_moves = make_moves
         self.owner = owner
         self.rounds_left = num_rounds
+        if view is not None and not accepts_view(make_moves):
+            view = None
+        self.view = view
 
     def __call__(self, owners, numbers):
         self.rounds_left -= 1
-        moves = self.make_moves(self.owner, self.rounds_left, owners, numbers)
+        if self.view is None:
+            moves = self.make_moves(
+                self.owner, self.rounds_left, owners, numbers)
+        else:
+            moves = self.make_moves(
+                self.owner, self.rounds_left, owners, numbers, view=self.view)
         return moves
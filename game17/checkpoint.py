@@ -0,0 +1,68 @@
+"""
+Checkpoints that let a competition pick up where it left off.
+
+After every game, the runners save what they have tallied so far (games
+played, bans, wins, times) as JSON in the output directory. Runs started
+with resume=True load it, skip the games it covers and carry on with exactly
+the same tallies. The file is replaced atomically, so a run that dies part
+way through a write leaves the previous checkpoint intact.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from .game17 import NumPyEncoder
+
+
+def checkpoint_path(output_directory, name):
+    'Where the checkpoint for competition name is kept'
+    # not .json, so they aren't mistaken for game records
+    return Path(output_directory) / f'{name}.checkpoint'
+
+
+def save_checkpoint(output_directory, name, players, state):
+    """
+    Save the state of a competition.
+
+    Parameters
+    ----------
+    output_directory : str or Path
+        Output directory of the competition.
+    name : str
+        Name of the competition, eg. 'battle-royale'.
+    players : iterable of ints
+        Players in the competition.
+    state : dict
+        Anything that can be written as JSON.
+
+    """
+    path = checkpoint_path(output_directory, name)
+    partial = f'{path}.partial'
+    with open(partial, 'w') as fh:
+        json.dump({'players': sorted(map(int, players)), 'state': state}, fh,
+                  cls=NumPyEncoder)
+    os.replace(partial, path)
+
+
+def load_checkpoint(output_directory, name, players):
+    """
+    Load the state of a competition saved by save_checkpoint.
+
+    Returns None if there is no checkpoint. Raises ValueError if the
+    checkpoint is for a different set of players.
+    """
+    path = checkpoint_path(output_directory, name)
+    try:
+        with open(path) as fh:
+            checkpoint = json.load(fh)
+    except FileNotFoundError:
+        return None
+    if checkpoint['players'] != sorted(map(int, players)):
+        raise ValueError(f'{path} is for players {checkpoint["players"]}')
+    return checkpoint['state']
+
+
+def player_dict(values):
+    'Dict keyed by player, from JSON (where the keys became strings)'
+    return {int(player): value for player, value in values.items()}
@@ -7,7 +7,10 @@ from pathlib import Path
 import click
 import pandas as pd
 
-from game17 import game_runners, basic_mover, T800
+from game17 import (
+        game_runners, basic_mover, T800, external_mover, evaluation, analysis,
+        archive, telemetry, scheduling, latency, profiling, verification,
+        backends)
 
 
 @click.group()
@@ -17,15 +20,48 @@ def cli():
 
 @cli.command()
 @click.option('-c', '--display-counts', is_flag=True)
-@click.argument('game', type=click.File())
+@click.option('-i', '--game-id', type=str, default=None,
+              help='Game to replay from an archive, eg. battle-royale-3.')
+@click.argument('game', type=click.Path(exists=True, dir_okay=False))
 @click.argument('colours', nargs=-1, type=str)
-def replay(colours, game, display_counts):
-    'Replay a game of Game 17 on the terminal'
-    game = json.load(game)
+def replay(colours, game, display_counts, game_id):
+    'Replay a game of Game 17 (a JSON record or a game in an archive)'
+    if archive.is_archive(game):
+        with archive.ArchiveReader(game) as games:
+            if game_id not in games:
+                raise click.BadParameter(
+                    'give one of ' + ', '.join(games.keys()),
+                    param_hint='--game-id')
+            game = games[game_id]
+    else:
+        with open(game) as fh:
+            game = json.load(fh)
     colours = {int(i): n for i, n in (c.split(':', 1) for c in colours)}
     game_runners.replay(game, display_counts, colours)
 
 
+@cli.command()
+@click.option('-j', '--processes', type=int, default=None,
+              help='Number of worker processes [default: one per CPU].')
+@click.argument('records', nargs=-1, type=click.Path(exists=True))
+@click.argument('output', nargs=1, type=click.Path(dir_okay=False))
+def analyse(records, output, processes):
+    '''
+    Tabulate the squares and pieces of every player at the end of every round
+    of stored games.
+
+    Parameters
+    ----------
+    records : files or directories
+        Game records, or directories of them (eg. rank output directories).
+    output : file
+        Tab separated file to write.
+
+    '''
+    count = analysis.analyse(records, output, processes)
+    click.echo(f'analysed {count} games')
+
+
 def import_module(filename):
     # thank you https://stackoverflow.com/q/67631
     module_path = Path(filename).resolve()
@@ -38,8 +74,31 @@ def import_module(filename):
     return module
 
 
-def load_modules(players, players_file, num_T800s):
-    'load the players'
+def get_mover_from_module(player_module):
+    'get_mover function for a basic or advanced player module'
+    if hasattr(player_module, 'make_moves'):
+        return basic_mover.get_mover_factory(player_module.make_moves)
+    return player_module.get_mover
+
+
+def load_external(player):
+    'get_mover function for a player that runs in its own process'
+    if Path(player).suffix == '.py':
+        command = [sys.executable, '-m', 'game17.external_player',
+                   str(Path(player).resolve())]
+    else:
+        command = [str(Path(player).resolve())]
+    return external_mover.get_external_mover_factory(command)
+
+
+def load_modules(players, players_file, num_T800s, external=False):
+    """
+    load the players
+
+    Python files are imported, unless external is set, in which case they
+    are run in their own processes. Any other file is run as an external
+    bot (see game17.external_mover).
+    """
     movers = {}
     colours = {}
     bad_modules = set()
@@ -50,12 +109,10 @@ def load_modules(players, players_file, num_T800s):
             colour = None
         players_file.write(f'{player} is player {i}\n')
         try:
-            player_module = import_module(player)
-            if hasattr(player_module, 'make_moves'):
-                movers[i] = basic_mover.get_mover_factory(
-                        player_module.make_moves)
+            if external or Path(player).suffix != '.py':
+                movers[i] = load_external(player)
             else:
-                movers[i] = player_module.get_mover
+                movers[i] = get_mover_from_module(import_module(player))
             if colour:
                 colours[i] = colour
         except TypeError as err:
@@ -85,10 +142,31 @@ def load_modules(players, players_file, num_T800s):
 @click.option('-T', '--num-T800s', type=int, default=0)
 @click.option('-p', '--players-file',
               type=click.File('w'), default='players.txt')
+@click.option('--backend', type=click.Choice(['numpy', 'numba', 'auto']),
+              default='numpy', help='Game engine backend.')
+@click.option('-x', '--external', is_flag=True,
+              help='Run Python players in their own processes.')
+@click.option('--progress', is_flag=True,
+              help='Report progress after every game on stderr.')
+@click.option('--metrics-file', type=click.Path(dir_okay=False),
+              default=None, help='JSON file to keep progress metrics in.')
+@click.option('-a', '--archive', 'use_archive', is_flag=True,
+              help='Write all games to one tournament.g17 archive.')
+@click.option('-j', '--processes', type=int, default=1,
+              help='Number of processes to play run-off games in.')
+@click.option('--ban-percentile', type=float, default=None,
+              help='Ban on this percentile of all of a player\'s move times, '
+              'rather than the mean time in a game.')
+@click.option('-S', '--seed', type=int, default=None,
+              help='Seed for the games [default: random].')
+@click.option('--resume', is_flag=True,
+              help='Carry on from the checkpoints in the output directory.')
 @click.argument('players', nargs=-1, type=click.Path(exists=True))
 @click.argument('output_directory', nargs=1, type=click.Path(file_okay=False))
 def rank(players, output_directory, display_counts, board_size, num_rounds,
-         time_threshold, num_games, num_t800s, players_file):
+         time_threshold, num_games, num_t800s, players_file, external,
+         backend, progress, metrics_file, use_archive, processes,
+         ban_percentile, seed, resume):
     '''
     Play Game 17, battle royale, followed by round-robin run-off competitions.
 
@@ -106,6 +184,14 @@ def rank(players, output_directory, display_counts, board_size, num_rounds,
         Number of rounds to play [default=50].
     time_threshold : float
         Ban players whose code takes more than time_threshold seconds (set negative to disable).
+    processes : int
+        Number of processes to play run-off games in [default=1].
+    ban_percentile : float
+        If given, ban on this percentile of CPU time per move, not the mean.
+    seed : int
+        If given, seed for the games, so that the tournament can be repeated.
+    resume : bool
+        Skip the games recorded in the checkpoints in output_directory.
 
     Returns
     -------
@@ -114,7 +200,8 @@ def rank(players, output_directory, display_counts, board_size, num_rounds,
 
     '''
     # load the players
-    movers, _, bad_modules = load_modules(players, players_file, num_t800s)
+    movers, _, bad_modules = load_modules(
+            players, players_file, num_t800s, external)
 
     # create the output directory if it doesn't exist
     os.makedirs(output_directory, exist_ok=True)
@@ -124,20 +211,25 @@ def rank(players, output_directory, display_counts, board_size, num_rounds,
               'players_that_failed_on_import.txt', 'w') as fh:
         fh.write(', '.join(map(str, bad_modules)) + '\n')
 
+    games = None
+    if use_archive:
+        games = archive.ArchiveWriter(
+            Path(output_directory) / f'tournament{archive.SUFFIX}',
+            'a' if resume else 'w')
+
+    progress = telemetry.print_progress if progress else None
     ranks = game_runners.battle_royale(
             movers, output_directory, num_games, board_size,
-            num_rounds, time_threshold)
+            num_rounds, time_threshold, backend, games, progress,
+            metrics_file, ban_percentile, seed, resume)
 
-    fine_ranks = []
-    for group, rank in enumerate(ranks):
-        if len(rank) == 1:
-            fine_ranks.append(rank)
-            continue
-        rank_movers = {p: m for p, m in movers.items() if p in rank}
-        fine_rank = game_runners.round_robin(
-            rank_movers, output_directory, board_size, num_rounds,
-            time_threshold, group)
-        fine_ranks.extend(fine_rank)
+    fine_ranks = scheduling.run_off(
+            movers, ranks, output_directory, board_size, num_rounds,
+            time_threshold, backend, games, progress, metrics_file, processes,
+            ban_percentile, seed, resume)
+
+    if games is not None:
+        games.close()
 
     with open(Path(output_directory) / 'ranks.txt', 'w') as rf:
         ranks = pd.DataFrame(
@@ -157,11 +249,23 @@ def rank(players, output_directory, display_counts, board_size, num_rounds,
 @click.option('-T', '--num-T800s', type=int, default=0)
 @click.option('-p', '--players-file',
               type=click.File('w'), default='players.txt')
+@click.option('--backend', type=click.Choice(['numpy', 'numba', 'auto']),
+              default='numpy', help='Game engine backend.')
+@click.option('-x', '--external', is_flag=True,
+              help='Run Python players in their own processes.')
+@click.option('--progress', is_flag=True,
+              help='Report progress after every game on stderr.')
+@click.option('--metrics-file', type=click.Path(dir_okay=False),
+              default=None, help='JSON file to keep progress metrics in.')
+@click.option('-S', '--seed', type=int, default=0)
+@click.option('-j', '--processes', type=int, default=None,
+              help='Number of worker processes [default: one per CPU].')
 @click.argument('players', nargs=-1, type=click.Path(exists=True))
 @click.argument('output_directory', nargs=1, type=click.Path(file_okay=False))
 def vs_zombies(players, output_directory, display_counts,
                board_size, num_rounds, time_threshold, num_games, num_t800s,
-               players_file):
+               players_file, external, backend, progress, metrics_file, seed,
+               processes):
     '''
     Play Game 17, battle royale, followed by round-robin run-off competitions.
 
@@ -179,6 +283,10 @@ def vs_zombies(players, output_directory, display_counts,
         Number of rounds to play [default=50].
     time_threshold : float
         Ban players whose code takes more than time_threshold seconds. (Negative to disable.)
+    seed : int
+        Seed shared by every player, so they all face the same boards [default=0].
+    processes : int
+        Number of processes to play in [default: one per CPU].
 
     Returns
     -------
@@ -187,7 +295,8 @@ def vs_zombies(players, output_directory, display_counts,
 
     '''
     # load the players
-    movers, _, bad_modules = load_modules(players, players_file, num_t800s)
+    movers, _, bad_modules = load_modules(
+            players, players_file, num_t800s, external)
 
     # create the output directory if it doesn't exist
     os.makedirs(output_directory, exist_ok=True)
@@ -198,16 +307,194 @@ def vs_zombies(players, output_directory, display_counts,
         fh.write(', '.join(map(str, bad_modules)) + '\n')
 
     with open(Path(output_directory) / 'vs-zombies.txt', 'w') as fh:
-        fh.write('player\tnum_wins\tmax_time\n')
-        for player in movers:
-            one_mover = {0: movers[player]}
-            victories, max_time = game_runners.vs_zombies(
-                    one_mover, num_games, board_size, num_rounds)
-            fh.write(f'{player}\t{victories[0]}\t{max_time[0]}\n')
+        fh.write('\t'.join(['player', 'num_wins', 'max_time'] +
+                            [c.replace(' ', '_') for c in latency.COLUMNS]) +
+                 '\n')
+        failures = scheduling.all_vs_zombies(
+                movers, fh, num_games, board_size, num_rounds, seed, backend,
+                processes, telemetry.print_progress if progress else None,
+                metrics_file)
+
+    # make a record of the players whose games failed
+    with open(Path(output_directory) /
+              'players_that_failed_vs_zombies.txt', 'w') as fh:
+        for player, err in failures.items():
+            fh.write(f'{player}\t{err!r}\n')
+
+    return 0
+
+
+@cli.command()
+@click.option('-s', '--board-size', type=int, default=14)
+@click.option('-r', '--num-rounds', type=int, default=50)
+@click.option('-g', '--num-games', type=int, default=100)
+@click.option('-m', '--min-games', type=int, default=10)
+@click.option('-b', '--batch-size', type=int, default=10)
+@click.option('-S', '--seed', type=int, default=0)
+@click.option('--confidence', type=float, default=0.95)
+@click.option('-p', '--players-file',
+              type=click.File('w'), default='players.txt')
+@click.option('--backend', type=click.Choice(['numpy', 'numba', 'auto']),
+              default='numpy', help='Game engine backend.')
+@click.option('-x', '--external', is_flag=True,
+              help='Run Python players in their own processes.')
+@click.argument('players', nargs=-1, type=click.Path(exists=True))
+@click.argument('output_directory', nargs=1, type=click.Path(file_okay=False))
+def evaluate(players, output_directory, board_size, num_rounds, num_games,
+             min_games, batch_size, seed, confidence, players_file,
+             external, backend):
+    '''
+    Compare players against zombies on identical seeded games.
+
+    Parameters
+    ----------
+    players : Python files
+        Python files containing make moves functions. The first is the
+        baseline that the others are compared to.
+    output_directory : directory
+        Directory into which results should be written.
+    board_size : int
+        Size of the board [default=14].
+    num_rounds : int
+        Number of rounds to play [default=50].
+    num_games : int
+        Maximum number of games per player [default=100].
+    min_games : int
+        Games to play before stopping early on a decision [default=10].
+    seed : int
+        Seed for the games [default=0].
+    confidence : float
+        Chance that a player no different to the baseline is not declared
+        different, over all of the checks [default=0.95].
+
+    Returns
+    -------
+    int
+        Non-zero on failure.
+
+    '''
+    # load the players
+    movers, _, bad_modules = load_modules(
+            players, players_file, 0, external)
+    # the others are only worth comparing to the baseline
+    if 1 in bad_modules:
+        print(f'The baseline, {players[0]}, failed to load', file=sys.stderr)
+        sys.exit(1)
+
+    # create the output directory if it doesn't exist
+    os.makedirs(output_directory, exist_ok=True)
+
+    # make a record of the players whose modules did not load
+    with open(Path(output_directory) /
+              'players_that_failed_on_import.txt', 'w') as fh:
+        fh.write(', '.join(map(str, bad_modules)) + '\n')
+
+    summary, comparisons, scores = evaluation.evaluate(
+        movers, num_games, board_size, num_rounds, seed, min_games,
+        batch_size, confidence, baseline=1, backend=backend)
+
+    out_dir = Path(output_directory)
+    with open(out_dir / 'evaluation-summary.txt', 'w') as fh:
+        fh.write(summary.to_string() + '\n')
+    with open(out_dir / 'evaluation-comparisons.txt', 'w') as fh:
+        fh.write(comparisons.to_string() + '\n')
+    scores.to_csv(out_dir / 'evaluation-scores.tsv', sep='\t',
+                  index_label='game')
+    click.echo(summary.to_string())
+    click.echo(comparisons.to_string())
 
     return 0
 
 
+@cli.command()
+@click.option('-s', '--board-size', type=int, default=14)
+@click.option('-r', '--num-rounds', type=int, default=50)
+@click.option('-g', '--num-games', type=int, default=5)
+@click.option('-S', '--seed', type=int, default=0)
+@click.option('-n', '--top', type=int, default=20,
+              help='Number of functions to list.')
+@click.option('-p', '--players-file',
+              type=click.File('w'), default='players.txt')
+@click.option('--backend', type=click.Choice(['numpy', 'numba', 'auto']),
+              default='numpy', help='Game engine backend.')
+@click.option('-x', '--external', is_flag=True,
+              help='Run Python players in their own processes.')
+@click.argument('players', nargs=-1, type=click.Path(exists=True))
+def profile(players, board_size, num_rounds, num_games, seed, top,
+            players_file, external, backend):
+    '''
+    Show where players spend their time in seeded games against zombies.
+
+    Parameters
+    ----------
+    players : Python files
+        Python files containing make moves functions.
+    num_games : int
+        Number of games to profile each player over [default=5].
+    seed : int
+        Seed for the games [default=0].
+    top : int
+        Number of functions to list, slowest first [default=20].
+
+    Returns
+    -------
+    int
+        Non-zero on failure.
+
+    '''
+    movers, _, bad_modules = load_modules(players, players_file, 0, external)
+    for i, player in enumerate(players, 1):
+        if i in bad_modules:
+            continue
+        click.echo(f'Player {i} ({player})')
+        result = profiling.profile(
+            movers[i], num_games, board_size, num_rounds, seed, backend)
+        click.echo(result.report(top))
+
+    return 1 if bad_modules else 0
+
+
+@cli.command()
+@click.option('--reference', type=click.Choice(['numpy', 'numba']),
+              default='numpy', help='Reference backend.')
+@click.option('--candidate', type=click.Choice(['numpy', 'numba', 'auto']),
+              default='auto', help='Backend to check.')
+@click.option('-n', '--num-cases', type=int, default=200)
+@click.option('-g', '--num-games', type=int, default=10)
+@click.option('-s', '--board-size', type=int, default=14)
+@click.option('-r', '--num-rounds', type=int, default=30)
+@click.option('-S', '--seed', type=int, default=0)
+def verify(reference, candidate, num_cases, num_games, board_size,
+           num_rounds, seed):
+    '''
+    Check that a backend plays exactly the same games as the reference.
+
+    Parameters
+    ----------
+    num_cases : int
+        Random boards to compare update_board and zombie turns on [default=200].
+    num_games : int
+        Whole games to compare, turn by turn [default=10].
+    board_size : int
+        Size of the board in games, and the largest random board [default=14].
+    seed : int
+        Seed for the check [default=0].
+
+    '''
+    reference = backends.get_backend(reference)
+    candidate = backends.get_backend(candidate)
+    click.echo(f'checking {candidate.name} against {reference.name}')
+    divergences = verification.verify(
+        reference, candidate, num_cases, num_games, board_size, num_rounds,
+        seed)
+    for divergence in divergences:
+        click.echo(str(divergence))
+    click.echo(f'{len(divergences)} of {2 * num_cases + num_games} cases '
+               'differed')
+    if divergences:
+        sys.exit(1)
+
+
 @cli.command()
 @click.option('-v', '--verbose', is_flag=True)
 @click.option('-c', '--display-counts', is_flag=True)
@@ -216,12 +503,16 @@ def vs_zombies(players, output_directory, display_counts,
 @click.option('-T', '--num-T800s', type=int, default=0)
 @click.option('-p', '--players-file',
               type=click.File('w'), default='players.txt')
+@click.option('--backend', type=click.Choice(['numpy', 'numba', 'auto']),
+              default='numpy', help='Game engine backend.')
+@click.option('-x', '--external', is_flag=True,
+              help='Run Python players in their own processes.')
 @click.argument('players', nargs=-1, type=str)  # todo make custom type
 def single(players, verbose, display_counts, board_size,
-           num_rounds, num_t800s, players_file):
+           num_rounds, num_t800s, players_file, external, backend):
     'Play a single game of game17'
     # load the players
     movers, colours, bad_modules = load_modules(
-            players, players_file, num_t800s)
+            players, players_file, num_t800s, external)
     game_runners.single(
-            movers, board_size, num_rounds, display_counts, colours)
+            movers, board_size, num_rounds, display_counts, colours, backend)
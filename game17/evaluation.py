@@ -0,0 +1,168 @@
+"""
+Compare players using common random numbers.
+
+Every candidate plays game i against zombies with the same seed, so they get
+the same board, the same turn order and, as far as the games agree, the same
+zombie moves. Differences in their scores are then mostly due to the players
+themselves, and comparing the scores game by game (pairing) needs far fewer
+games to tell two players apart than comparing independent win counts.
+
+Play stops as soon as the comparisons are decided, so they are looked at
+after every batch of games. Each look is a chance for an interval to miss
+zero by luck, so the intervals are widened (Bonferroni) to the confidence
+1 - (1 - confidence) / looks, where looks is the most looks there can be.
+Then a candidate that is really no different to the baseline is declared
+different with probability at most 1 - confidence, however many looks it
+takes (as far as the normal approximation holds).
+"""
+
+from collections import Counter
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .game_runners import _game_seed, game17
+
+
+def paired_interval(differences, confidence=0.95):
+    """
+    Normal confidence interval for the mean of paired differences.
+
+    Parameters
+    ----------
+    differences : array of numbers
+        Difference in score between two players, game by game.
+    confidence : float, optional
+        Confidence level of the interval. The default is 0.95.
+
+    Returns
+    -------
+    mean, lower, upper : floats
+        Mean difference and the bounds of the interval.
+
+    """
+    differences = np.asarray(differences, dtype=float)
+    mean = differences.mean()
+    if len(differences) < 2:
+        return mean, -np.inf, np.inf
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half_width = z * differences.std(ddof=1) / np.sqrt(len(differences))
+    return mean, mean - half_width, mean + half_width
+
+
+def num_looks(num_games, min_games=10, batch_size=10):
+    'Largest number of times evaluate can check its comparisons'
+    return len({played for played in range(min_games, num_games + 1)
+                if played % batch_size == 0} | {num_games})
+
+
+def evaluate(candidates, num_games=100, board_size=14, num_rounds=50,
+             seed=0, min_games=10, batch_size=10, confidence=0.95,
+             baseline=None, backend='numpy'):
+    """
+    Play candidate players against zombies on identical seeded games until
+    each of them can be told apart from the baseline, or num_games is
+    reached.
+
+    Parameters
+    ----------
+    candidates : dict of functions
+        A get_mover function for each candidate. Keys are candidate names.
+    num_games : int, optional
+        Maximum number of games per candidate. The default is 100.
+    board_size : int, optional
+        Edge length of the board. The default is 14.
+    num_rounds : int, optional
+        Number of rounds per game. The default is 50.
+    seed : int or tuple of ints, optional
+        Game i is played with seed (seed, i), or (*seed, i) for a tuple.
+        The default is 0.
+    min_games : int, optional
+        Number of games to play before stopping early. The default is 10.
+    batch_size : int, optional
+        Number of games between checks for a decision. The default is 10.
+    confidence : float, optional
+        Chance that a candidate that is no different to the baseline is not
+        declared different, over all of the checks. Each check uses paired
+        intervals at confidence 1 - (1 - confidence) / num_looks(num_games,
+        min_games, batch_size). The default is 0.95.
+    baseline : key of candidates, optional
+        Candidate the others are compared to. The default is the first.
+    backend : str or backend object, optional
+        Game engine backend (see game17.backends). The default is 'numpy'.
+
+    Returns
+    -------
+    summary : pandas DataFrame
+        For each candidate, games played, wins, the mean, standard
+        deviation and quantiles of squares owned at the end of each game,
+        and maximum average time per turn.
+    comparisons : pandas DataFrame
+        For each candidate other than the baseline, the mean paired
+        difference in squares owned, its (widened) confidence interval and
+        whether the interval excludes zero.
+    scores : pandas DataFrame
+        Squares owned at the end of each game by each candidate.
+
+    """
+    names = list(candidates)
+    if baseline is None:
+        baseline = names[0]
+    others = [name for name in names if name != baseline]
+    scores = {name: [] for name in names}
+    victories = Counter()
+    max_time = Counter()
+    # wide enough that all of the looks together keep the error rate
+    look_confidence = 1 - (1 - confidence) / num_looks(
+        num_games, min_games, batch_size)
+
+    def decided():
+        for name in others:
+            differences = np.subtract(scores[name], scores[baseline])
+            _, lower, upper = paired_interval(differences, look_confidence)
+            if lower <= 0 <= upper:
+                return False
+        return True
+
+    for i in range(num_games):
+        for name in names:
+            game_scores, times, record = game17(
+                {0: candidates[name]}, board_size=board_size,
+                num_rounds=num_rounds, seed=_game_seed(seed, i), backend=backend)
+            score = game_scores.get(0, 0)
+            scores[name].append(score)
+            if score == max(game_scores.values()):
+                victories[name] += 1
+            max_time[name] = max(max_time[name], times[0])
+        played = i + 1
+        if (others and played >= min_games and played % batch_size == 0
+                and decided()):
+            break
+
+    summary = {}
+    for name in names:
+        squares = np.array(scores[name])
+        summary[name] = {
+            'games': len(squares),
+            'wins': victories[name],
+            'mean squares': squares.mean(),
+            'sd squares': squares.std(ddof=1) if len(squares) > 1 else 0.,
+            '10%': np.quantile(squares, 0.1),
+            'median': np.median(squares),
+            '90%': np.quantile(squares, 0.9),
+            'max time': max_time[name]}
+    summary = pd.DataFrame.from_dict(summary, orient='index')
+
+    comparisons = {}
+    for name in others:
+        differences = np.subtract(scores[name], scores[baseline])
+        mean, lower, upper = paired_interval(differences, look_confidence)
+        comparisons[f'{name} - {baseline}'] = {
+            'mean difference': mean, 'lower': lower, 'upper': upper,
+            'decided': not lower <= 0 <= upper}
+    comparisons = pd.DataFrame.from_dict(
+        comparisons, orient='index',
+        columns=['mean difference', 'lower', 'upper', 'decided'])
+
+    return summary, comparisons, pd.DataFrame(scores)
@@ -0,0 +1,262 @@
+"""
+Movers that run in a separate, long-lived process.
+
+The engine and the bot talk over the bot's stdin and stdout, one message per
+line, with boards and moves written as space separated integers. A bot
+process is started the first time it is needed and then reused for every
+game it plays, so expensive initialisation only happens once and the bot
+cannot touch the engine's state.
+
+Engine to bot:
+
+    game <owner> <board_size> <num_rounds>
+    <turn order>
+    <owners, flattened>
+    <numbers, flattened>
+
+is sent at the start of each game, then
+
+    turn <owner> <rounds_left>
+    <owners, flattened>
+    <numbers, flattened>
+
+is sent at each of owner's turns, and
+
+    quit
+
+is sent when the engine is finished with the bot.
+
+Bot to engine, once it has started up and after setting up each game:
+
+    ready
+
+and in reply to each turn:
+
+    <i j direction_code count i j direction_code count ...>
+
+that is, the array move format flattened onto one line (empty for no moves).
+The engine waits for ready before it starts timing the bot's turns, so the
+bot isn't charged for starting up or setting up.
+
+Any Python player can be run this way with
+
+    python -m game17.external_player player.py
+
+A bot that takes longer than its timeout to reply to a turn (or longer than
+its start_timeout to be ready) is killed, and it is started again for its
+next game.
+"""
+
+import atexit
+import contextlib
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+import numpy as np
+
+from .game17 import moves_to_array
+
+
+def _format_ints(values):
+    return ' '.join(map(str, np.asarray(values).ravel().tolist())) + '\n'
+
+
+def _parse_ints(line):
+    return np.array(line.split(), dtype=np.int64)
+
+
+def _read_replies(stdout, replies):
+    'Put every line from a bot on replies, then an empty line when it exits'
+    for line in stdout:
+        replies.put(line)
+    replies.put('')
+
+
+class ExternalBot(object):
+    'A bot process that is started once and plays any number of games'
+
+    def __init__(self, command, timeout=10., start_timeout=60.):
+        self.command = command
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.process = None
+        self.latencies = []
+        atexit.register(self.close)
+
+    def start(self):
+        'Start the bot process if it is not already running'
+        if self.process is None or self.process.poll() is not None:
+            self.process = subprocess.Popen(
+                self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                text=True, bufsize=1)
+            # replies are read in a thread, so that turns can time out
+            self.replies = queue.Queue()
+            threading.Thread(
+                target=_read_replies, args=(self.process.stdout, self.replies),
+                daemon=True).start()
+            self._ready('start')
+
+    def _reply(self, timeout, doing):
+        'Next line from the bot, killing it if it takes more than timeout'
+        try:
+            return self.replies.get(timeout=timeout)
+        except queue.Empty:
+            self.process.kill()
+            self.process.wait()
+            raise RuntimeError(f'bot {self.command} took more than '
+                               f'{timeout} seconds to {doing}')
+
+    def _ready(self, doing):
+        line = self._reply(self.start_timeout, doing)
+        if not line:
+            raise RuntimeError(f'bot {self.command} closed its output')
+        if line.strip() != 'ready':
+            raise RuntimeError(f'bot {self.command} sent {line!r} instead '
+                               f'of ready')
+
+    def _send(self, *lines):
+        self.process.stdin.write(''.join(lines))
+        self.process.stdin.flush()
+
+    def new_game(self, owner, turn_order, num_rounds, owners, numbers):
+        'Tell the bot that it is playing as owner in a new game'
+        self.start()
+        self._send(f'game {owner} {owners.shape[0]} {num_rounds}\n',
+                   _format_ints(turn_order),
+                   _format_ints(owners),
+                   _format_ints(numbers))
+        self._ready('set up a game')
+
+    def turn(self, owner, rounds_left, owners, numbers):
+        'Ask the bot for its moves as owner and return them as an array'
+        start = time.perf_counter()
+        self._send(f'turn {owner} {rounds_left}\n',
+                   _format_ints(owners),
+                   _format_ints(numbers))
+        try:
+            line = self._reply(self.timeout, 'move')
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+        if not line:
+            raise RuntimeError(f'bot {self.command} closed its output')
+        return _parse_ints(line).reshape((-1, 4))
+
+    def close(self):
+        'Ask the bot to quit and wait for it'
+        if self.process is None or self.process.poll() is not None:
+            return
+        try:
+            self._send('quit\n')
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+def get_external_mover_factory(command, timeout=10., start_timeout=60.):
+    """
+    Creates a get_mover function for a bot run as an external process.
+
+    Parameters
+    ----------
+    command : list of str
+        Command that starts the bot, as passed to subprocess.Popen.
+    timeout : float, optional
+        Seconds to wait for the bot to reply to a turn before killing it.
+        The default is 10.
+    start_timeout : float, optional
+        Seconds to wait for the bot to be ready after starting up or being
+        told about a new game. The default is 60.
+
+    Returns
+    -------
+    function
+        A get_mover function. Its bot attribute is the ExternalBot, which
+        records the latency of every turn in its latencies list.
+
+    """
+    bot = ExternalBot(command, timeout, start_timeout)
+
+    def get_mover(owner=None, owners=None, numbers=None,
+                  turn_order=None, num_rounds=None):
+        bot.new_game(owner, turn_order, num_rounds, owners, numbers)
+        return ExternalMover(bot, owner, num_rounds)
+    get_mover.bot = bot
+    return get_mover
+
+
+class ExternalMover(object):
+    # the bot's CPU time is spent in its own process, where the engine can't
+    # measure it, so it is charged the wall clock time of its turns instead
+    charge_wall_time = True
+
+    def __init__(self, bot, owner, num_rounds):
+        self.bot = bot
+        self.owner = owner
+        self.rounds_left = num_rounds
+
+    def __call__(self, owners, numbers):
+        self.rounds_left -= 1
+        return self.bot.turn(self.owner, self.rounds_left, owners, numbers)
+
+
+def serve(get_mover, stdin=sys.stdin, stdout=sys.stdout):
+    """
+    Play games for an engine on the other end of stdin and stdout.
+
+    Parameters
+    ----------
+    get_mover : function
+        The player's get_mover function (use basic_mover.get_mover_factory
+        for a basic player).
+    stdin, stdout : file objects
+        Where messages from the engine are read and replies written. Anything
+        the player prints goes to stderr.
+
+    """
+    movers = {}
+    # the engine doesn't time anything until the player is ready
+    stdout.write('ready\n')
+    stdout.flush()
+    for line in stdin:
+        message = line.split()
+        if not message:
+            continue
+        if message[0] == 'quit':
+            break
+        if message[0] == 'game':
+            owner, board_size, num_rounds = map(int, message[1:])
+            turn_order = _parse_ints(stdin.readline()).tolist()
+            owners = _parse_ints(stdin.readline()).reshape(
+                (board_size, board_size))
+            numbers = _parse_ints(stdin.readline()).reshape(
+                (board_size, board_size))
+            # keep the player's prints out of the engine's messages
+            with contextlib.redirect_stdout(sys.stderr):
+                movers[owner] = get_mover(
+                    owner=owner, owners=owners, numbers=numbers,
+                    turn_order=turn_order, num_rounds=num_rounds)
+            stdout.write('ready\n')
+            stdout.flush()
+        elif message[0] == 'turn':
+            owner = int(message[1])
+            owners = _parse_ints(stdin.readline())
+            numbers = _parse_ints(stdin.readline())
+            board_size = int(np.sqrt(len(owners)))
+            owners = owners.reshape((board_size, board_size))
+            numbers = numbers.reshape((board_size, board_size))
+            try:
+                with contextlib.redirect_stdout(sys.stderr):
+                    moves = movers[owner](owners, numbers)
+                if not isinstance(moves, np.ndarray):
+                    moves = moves_to_array(moves)
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+                moves = []
+            stdout.write(_format_ints(moves))
+            stdout.flush()
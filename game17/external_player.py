@@ -0,0 +1,33 @@
+"""
+Serve a Python player to an engine over stdin and stdout, with
+
+    python -m game17.external_player player.py
+
+(see game17.external_mover for the protocol).
+"""
+
+import os
+import sys
+
+from .cli import import_module, get_mover_from_module
+from .external_mover import serve
+
+
+def main(argv=None):
+    'Serve the player in the Python file named on the command line'
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print('usage: python -m game17.external_player player.py',
+              file=sys.stderr)
+        return 1
+    # replies go to a copy of stdout, and stdout itself goes to stderr, so
+    # nothing the player prints (at import, or from C code) reaches the engine
+    sys.stdout.flush()
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    serve(get_mover_from_module(import_module(argv[0])), sys.stdin, replies)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
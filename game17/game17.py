@@ -8,6 +8,10 @@ Created on Tue Apr 12 10:18:04 2022
 __version__ = 1.0
 
 
+from functools import lru_cache
+import json
+import operator
+
 import numpy as np
 from matplotlib import colors
 
@@ -38,7 +42,33 @@ def find_owned_pieces(owner, owners, numbers):
     return owned_pieces
 
 
-def create_board(board_size=14):
+def board_dtypes(board_size):
+    """
+    The narrowest integer dtypes that can safely hold the owners and numbers
+    of a board. Owners are at most board_size**2 - 1 and no square can hold
+    more than all 4*board_size**2 pieces.
+
+    Parameters
+    ----------
+    board_size : int
+        The edge length of the board.
+
+    Returns
+    -------
+    owner_dtype : numpy dtype
+        dtype for the owners array.
+    number_dtype : numpy dtype
+        dtype for the numbers array.
+
+    """
+    owner_dtype = np.result_type(
+        np.int16, np.min_scalar_type(-board_size**2))
+    number_dtype = np.result_type(
+        np.int32, np.min_scalar_type(-4*board_size**2))
+    return owner_dtype, number_dtype
+
+
+def create_board(board_size=14, rng=np.random):
     """
     Sets up the board. Each player initially owns one random square and
     each square initially contains four pieces.
@@ -47,6 +77,8 @@ def create_board(board_size=14):
     ----------
     board_size : int, optional
         The edge length of the board. The default is 14.
+    rng : numpy Generator or RandomState, optional
+        Source of randomness. The default is numpy.random.
 
     Returns
     -------
@@ -56,13 +88,20 @@ def create_board(board_size=14):
         The number of pieces in each square.
 
     """
-    owners = np.arange(board_size**2)
-    np.random.shuffle(owners)
+    owner_dtype, number_dtype = board_dtypes(board_size)
+    owners = np.arange(board_size**2, dtype=owner_dtype)
+    rng.shuffle(owners)
     owners = owners.reshape((board_size, board_size))
-    numbers = 4*np.ones((board_size, board_size), dtype=int)
+    numbers = np.full((board_size, board_size), 4, dtype=number_dtype)
     return owners, numbers
 
 
+_CHANGES = {'n': np.array([-1, 0]),
+            's': np.array([1, 0]),
+            'e': np.array([0, 1]),
+            'w': np.array([0, -1])}
+
+
 def destination(square, direction, board_size):
     """
     Translates a direction instruction and a starting square into the
@@ -83,14 +122,73 @@ def destination(square, direction, board_size):
         The destination square.
 
     """
-    change = {'n': np.array([-1, 0]),
-              's': np.array([1, 0]),
-              'e': np.array([0, 1]),
-              'w': np.array([0, -1])}[direction]
-    return (square + change) % board_size
+    return (square + _CHANGES[direction]) % board_size
+
+
+@lru_cache(maxsize=None)
+def neighbour_table(board_size):
+    """
+    Flat indices of the neighbours of every square on a board. The table is
+    computed once for each board size and shared, so it is read only.
+
+    Parameters
+    ----------
+    board_size : int
+        Edge length of the board.
+
+    Returns
+    -------
+    board_size**2 x 4 array of ints
+        Row i*board_size + j contains the flat indices of the squares to the
+        'n', 's', 'e', and 'w' of square (i, j). For example,
+        numbers.ravel()[neighbour_table(board_size)] gives the number of
+        pieces in each neighbour of each square.
+
+    """
+    i, j = np.divmod(np.arange(board_size**2), board_size)
+    table = np.empty((board_size**2, 4), dtype=np.intp)
+    for k, direction in enumerate('nsew'):
+        change_i, change_j = _CHANGES[direction]
+        table[:, k] = (((i + change_i) % board_size) * board_size +
+                       (j + change_j) % board_size)
+    table.setflags(write=False)
+    return table
+
+
+DIRECTIONS = 'nsew'
+# exact lookups, unlike DIRECTIONS.index, which would find '' or 'ns'
+_DIRECTION_CODES = {direction: k for k, direction in enumerate(DIRECTIONS)}
+
+
+def moves_to_array(moves):
+    """
+    Convert a list of move triples into the array move format.
 
+    Parameters
+    ----------
+    moves : list of triples
+        Each tuple contains a 2-element numpy array of ints giving the
+        current coordinates of the pieces to be moved, a string giving the
+        direction to move ('n', 's', 'e', or 'w'), and an int giving the
+        number of pieces to move.
+
+    Returns
+    -------
+    k x 4 array of ints
+        Each row contains the i-coordinate, the j-coordinate, the direction
+        code (the index of the direction in 'nsew') and the number of pieces
+        to move.
 
-def update_board(owner, moves, owners, numbers):
+    """
+    array = np.zeros((len(moves), 4), dtype=np.int64)
+    for row, (square, direction, number) in zip(array, moves):
+        row[:2] = square
+        row[2] = _DIRECTION_CODES[direction]
+        row[3] = number
+    return array
+
+
+def update_board(owner, moves, owners, numbers, rng=np.random):
     """
     Takes a set of moves, as generated for instance by make_moves_zombie,
     and applies them to a board.
@@ -99,40 +197,64 @@ def update_board(owner, moves, owners, numbers):
     ----------
     owner : int
         Player number.
-    moves : list of triples
+    moves : list of triples or k x 4 array of ints
         Each tuple contains a 2-element numpy array of ints giving the
         current coordinates of the pieces to be moved, a string giving the
         direction to move ('n', 's', 'e', or 'w'), and an int giving the
-        number of pieces to move..
+        number of pieces to move. Negative coordinates count back from the
+        end of the board, as numpy indices do. Alternatively, each row of an
+        array contains the i-coordinate, the j-coordinate, the direction
+        code (0, 1, 2, or 3 for 'n', 's', 'e', or 'w') and the number of
+        pieces to move.
     owners : square array of ints
         Current owner of each square.
     numbers : square array of ints
         Current number of pieces in each square.
+    rng : numpy Generator or RandomState, optional
+        Source of randomness for breaking ties. The default is numpy.random.
 
     Returns
     -------
     None.
 
     """
-    board_size = owners.shape[0]
-    outgoing = np.zeros_like(numbers)
-    incoming = np.zeros_like(numbers)
-    for square, direction, number in moves:
-        to = destination(square, direction, board_size)
-        if (to >= board_size).any() or (to < 0).any():
-            print('player %d skipped: square coordinates out of bounds\n'
-                  % owner)
-            return
-        if owners[tuple(square)] != owner:
-            print('player %d skipped: attempt to move unowned pieces\n'
-                  % owner)
+    if isinstance(moves, np.ndarray):
+        outgoing, incoming = _tally_move_array(owner, moves, owners, numbers)
+        if outgoing is None:
             return
-        outgoing[tuple(square)] += number
-        incoming[tuple(to)] += number
+    else:
+        board_size = owners.shape[0]
+        table = neighbour_table(board_size)
+        # tally in 64 bits so that outrageous moves can't overflow the board
+        outgoing = np.zeros(numbers.shape, dtype=np.int64)
+        incoming = np.zeros(numbers.shape, dtype=np.int64)
+        for square, direction, number in moves:
+            # Python ints, so that narrow coordinates can't overflow below
+            i, j = map(operator.index, square)
+            if not (-board_size <= i < board_size and
+                    -board_size <= j < board_size):
+                print('player %d skipped: square coordinates out of bounds\n'
+                      % owner)
+                return
+            # negative coordinates count from the end, as numpy indices do
+            i %= board_size
+            j %= board_size
+            if owners[i, j] != owner:
+                print('player %d skipped: attempt to move unowned pieces\n'
+                      % owner)
+                return
+            from_square = i * board_size + j
+            outgoing.flat[from_square] += number
+            incoming.flat[table[from_square, _DIRECTION_CODES[direction]]] \
+                += number
     if (outgoing > numbers).any():
         print('player %d skipped: attempt to move more pieces than owned\n'
               % owner)
         return
+    if (outgoing < 0).any() or (incoming < 0).any():
+        print('player %d skipped: attempt to move a negative number of '
+              'pieces\n' % owner)
+        return
     numbers -= outgoing
     ix = incoming > 0
     old_numbers = numbers[ix]
@@ -145,11 +267,44 @@ def update_board(owner, moves, owners, numbers):
         elif inc_numbers[i] > old_numbers[i]:
             new_owners[i] = owner
         else:
-            new_owners[i] = np.random.choice([old_owners[i], owner])
+            new_owners[i] = rng.choice([old_owners[i], owner])
     numbers += incoming
     owners[ix] = new_owners
 
 
+def _tally_move_array(owner, moves, owners, numbers):
+    """
+    Validate an array of moves and total the pieces leaving and arriving at
+    each square. Returns (None, None) if the player should be skipped.
+    """
+    if moves.size == 0:
+        moves = np.zeros((0, 4), dtype=int)
+    if moves.ndim != 2 or moves.shape[1] != 4:
+        raise ValueError('array moves must have shape (k, 4)')
+    if not np.issubdtype(moves.dtype, np.integer):
+        raise ValueError('array moves must contain integers')
+    # narrow moves would overflow when working out flat indices
+    moves = moves.astype(np.intp, copy=False)
+    board_size = owners.shape[0]
+    i, j, direction, number = moves.T
+    if ((i < 0) | (i >= board_size) | (j < 0) | (j >= board_size) |
+            (direction < 0) | (direction >= len(DIRECTIONS))).any():
+        print('player %d skipped: square coordinates out of bounds\n'
+              % owner)
+        return None, None
+    if (owners[i, j] != owner).any():
+        print('player %d skipped: attempt to move unowned pieces\n'
+              % owner)
+        return None, None
+    from_square = i * board_size + j
+    to_square = neighbour_table(board_size)[from_square, direction]
+    outgoing = np.zeros(numbers.shape, dtype=np.int64)
+    incoming = np.zeros(numbers.shape, dtype=np.int64)
+    np.add.at(outgoing.reshape(-1), from_square, number)
+    np.add.at(incoming.reshape(-1), to_square, number)
+    return outgoing, incoming
+
+
 def matplotlib_to_rgb(colour_name):
     'urgh matplotlib'
     rgb = int(colors.to_hex(colour_name)[1:], 16)
@@ -209,17 +364,29 @@ def print_board(owners, numbers, colours=None, print_numbers=False):
 
 def board_diff(before, after):
     'JSON dumpable sparse representation of a diff between 2D arrays'
-    ix = after != before
-    board_size = before.shape[0]
-    board_range = np.arange(board_size)
-    from_i, from_j = np.meshgrid(board_range, board_range,
-                                 indexing='ij')
-    diff = np.vstack(
-        (from_i[ix], from_j[ix], after[ix])).T
+    from_i, from_j = np.nonzero(after != before)
+    dtype = np.result_type(after.dtype, np.min_scalar_type(after.shape[0]))
+    diff = np.empty((len(from_i), 3), dtype=dtype)
+    diff[:, 0] = from_i
+    diff[:, 1] = from_j
+    diff[:, 2] = after[from_i, from_j]
     return diff
 
 
 def apply_diff(before, diff):
     'Apply a diff to a 2D array'
-    for i, j, after in diff:
-        before[i, j] = after
+    diff = np.asarray(diff, dtype=np.int64).reshape((-1, 3))
+    before[diff[:, 0], diff[:, 1]] = diff[:, 2]
+
+
+# thanks https://stackoverflow.com/a/27050186
+class NumPyEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        elif isinstance(obj, np.floating):
+            return float(obj)
+        elif isinstance(obj, np.ndarray):
+            return obj.tolist()
+        else:
+            return super(NumPyEncoder, self).default(obj)
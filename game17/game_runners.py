@@ -9,8 +9,12 @@ import pandas as pd
 import numpy as np
 
 from .game17 import (
-        print_board, apply_diff, board_diff, create_board, update_board)
-from .zombie import make_moves as make_moves_zombie
+        print_board, apply_diff, board_dtypes, create_board, NumPyEncoder)
+from .game_view import GameView, accepts_view
+from .backends import get_backend
+from .checkpoint import load_checkpoint, player_dict, save_checkpoint
+from .latency import COLUMNS, Latencies
+from .telemetry import Progress
 
 
 def replay(game, display_counts=False, colours=None):
@@ -26,8 +30,9 @@ def replay(game, display_counts=False, colours=None):
         The default is False.
 
     """
-    owners = np.array(game['owners'])
-    numbers = np.array(game['numbers'])
+    owner_dtype, number_dtype = board_dtypes(len(game['owners']))
+    owners = np.array(game['owners'], dtype=owner_dtype)
+    numbers = np.array(game['numbers'], dtype=number_dtype)
     diffs = game['diffs']
 
     print("let's go")
@@ -52,60 +57,109 @@ def replay(game, display_counts=False, colours=None):
 
 
 def single(movers, board_size=14, num_rounds=50,
-           display_counts=False, colours=None):
+           display_counts=False, colours=None, backend='numpy'):
     'Run a single game of game17 and display to the terminal'
     scores, times, record = game17(
-        movers, board_size=board_size, num_rounds=num_rounds)
+        movers, board_size=board_size, num_rounds=num_rounds,
+        backend=backend)
     replay(record, display_counts, colours)
     times = pd.DataFrame(times, index=['times'])
     print()
     print(times.transpose())
 
 
-# thanks https://stackoverflow.com/a/27050186
-class NumPyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        else:
-            return super(NumPyEncoder, self).default(obj)
+def save_record(output_directory, game_id, record, archive=None):
+    'Write a game record to its own JSON file, or to archive if given'
+    if archive is None:
+        with open(Path(output_directory) / f'{game_id}.json', 'w') as mf:
+            json.dump(record, mf, cls=NumPyEncoder)
+    else:
+        archive.write(game_id, record)
 
 
 def round_robin(movers, output_directory, board_size=14, num_rounds=50,
-                time_threshold=0.01, group=None):
-    'Run a round-robin competition and dump results to files'
+                time_threshold=0.01, group=None, backend='numpy',
+                archive=None, progress=None, metrics_file=None, play=None,
+                ban_percentile=None, seed=None, resume=False):
+    '''
+    Run a round-robin competition and dump results to files
+
+    Game records are written to archive (a game17.archive.ArchiveWriter)
+    instead of one file per game if it is given. If progress is given, it is
+    called with a game17.telemetry snapshot after each game, and snapshots
+    are also written to metrics_file if it is given.
+
+    Players are banned if the mean time their function takes in a game is
+    more than time_threshold or, if ban_percentile is given, if that
+    percentile of the CPU time of all of their calls so far is.
+
+    If seed is given, game k is played with seed (seed, k). A checkpoint is
+    saved after every game (see game17.checkpoint) and, if resume is set,
+    the competition carries on from the last one in output_directory.
+
+    Games are played by calling play with a pair of players, a dict of
+    latencies and the seed for the game. It must return what game17
+    returns for that pair, and count the times of the calls in latencies as
+    game17 does. The default plays the game here (see game17.scheduling for
+    playing them elsewhere).
+    '''
+    if play is None:
+        def play(pair, latencies, seed):
+            return game17({p: movers[p] for p in pair},
+                          board_size=board_size, num_rounds=num_rounds,
+                          seed=seed, backend=backend, latencies=latencies)
     # create the output directory if it doesn't exist
     os.makedirs(output_directory, exist_ok=True)
     # play the games
     out_dir = Path(output_directory)
+    name = f'round-robin{_group_suffix(group)}'
     outcomes = defaultdict(list)
     max_time = Counter()
+    latencies = {}
     banned = set()
+    done = 0
+    state = load_checkpoint(out_dir, name, movers) if resume else None
+    if state is not None:
+        done = state['games']
+        banned = set(state['banned'])
+        for player1, player2, winners in state['outcomes']:
+            outcomes[frozenset((player1, player2))] = winners
+        max_time.update(player_dict(state['max_time']))
+        latencies = {p: Latencies.from_dict(l)
+                     for p, l in player_dict(state['latencies']).items()}
+    pairs = list(combinations(movers, 2))
+    tracker = Progress(
+        len(pairs) - done, progress, metrics_file,
+        label='round robin' + ('' if group is None else f' {group}'))
     # round robin, player vs player
-    for player1, player2 in combinations(movers, 2):
+    for k, (player1, player2) in enumerate(pairs[done:], done):
         # if either player is banned, skip it
         if player1 in banned or player2 in banned:
+            tracker.game_done(0, banned)
             continue
-        competitors = {player1: movers[player1], player2: movers[player2]}
-        scores, times, record = game17(
-            competitors, board_size=board_size, num_rounds=num_rounds)
+        scores, times, record = play(
+            (player1, player2), latencies, _game_seed(seed, k))
 
         # save the record of the game
-        with open(out_dir / f'{player1} vs {player2}.json', 'w') as mf:
-            json.dump(record, mf, cls=NumPyEncoder)
+        save_record(out_dir, f'{player1} vs {player2}', record, archive)
         # if player takes more than 0.01 seconds, ban them
         for player in player1, player2:
-            if time_threshold > 0 and times[player] > time_threshold:
+            if _too_slow(player, times, latencies, time_threshold,
+                         ban_percentile):
                 banned.add(player)
             max_time[player] = max(max_time[player], times[player])
         # save the outcomes
         for player, score in scores.items():
             if player in {player1, player2} and score == max(scores.values()):
-                outcomes[frozenset((player1, player2))].append(player)
+                outcomes[frozenset((player1, player2))].append(int(player))
+        save_checkpoint(out_dir, name, movers, {
+            'games': k + 1,
+            'banned': sorted(banned),
+            'outcomes': [sorted(pair) + [winners]
+                         for pair, winners in outcomes.items()],
+            'max_time': {int(p): t for p, t in max_time.items()},
+            'latencies': {int(p): l.to_dict() for p, l in latencies.items()}})
+        tracker.game_done(len(record['diffs']), banned)
 
     # expunge the banned
     for the_banned in banned:
@@ -114,10 +168,7 @@ def round_robin(movers, output_directory, board_size=14, num_rounds=50,
                 del outcomes[game]
 
     # print game-by-game results
-    if group:
-        group = f'-{group}'
-    else:
-        group = ''
+    group = _group_suffix(group)
     with open(out_dir / f'round-robin{group}.txt', 'w') as rr:
         pretty_outcomes = {
             ' vs '.join(map(str, players)): ', '.join(map(str, winners))
@@ -140,36 +191,99 @@ def round_robin(movers, output_directory, board_size=14, num_rounds=50,
     with open(out_dir / f'round-robin-summary{group}.txt', 'w') as summary:
         winners = pd.DataFrame(
             {p: [str(winners.get(p, 'banned' if p in banned else 0)),
-                 max_time[p]]
-             for p in movers}, index=['games won', 'max time'])
+                 max_time[p]] + _latency_summary(latencies, p)
+             for p in movers}, index=['games won', 'max time'] + COLUMNS)
         summary.write(winners.transpose().to_string() + '\n')
 
     return ranks
 
 
+def _group_suffix(group):
+    'Suffix for the file names of a round-robin group'
+    return f'-{group}' if group else ''
+
+
+def _game_seed(seed, *key):
+    'Seed for a game in a competition seeded with seed (None if not seeded)'
+    if seed is None:
+        return None
+    return (*(seed if isinstance(seed, tuple) else (seed,)), *key)
+
+
+def _too_slow(player, times, latencies, time_threshold, ban_percentile):
+    'Whether player has broken the time limit'
+    if time_threshold <= 0:
+        return False
+    if ban_percentile is None:
+        return times[player] > time_threshold
+    if player not in latencies:
+        return False
+    return latencies[player].cpu.exceeds(ban_percentile, time_threshold)
+
+
+def _latency_summary(latencies, player):
+    'Latency percentiles of player, in the order of latency.COLUMNS'
+    summary = latencies.get(player, Latencies()).summary()
+    return [summary[column] for column in COLUMNS]
+
+
 def battle_royale(movers, output_directory, num_games=100, board_size=14,
-                  num_rounds=50, time_threshold=0.01):
-    'Run multiple battle royale competitions and dump the results files'
+                  num_rounds=50, time_threshold=0.01, backend='numpy',
+                  archive=None, progress=None, metrics_file=None,
+                  ban_percentile=None, seed=None, resume=False):
+    '''
+    Run multiple battle royale competitions and dump the results files
+
+    Game records are written to archive (a game17.archive.ArchiveWriter)
+    instead of one file per game if it is given. If progress is given, it is
+    called with a game17.telemetry snapshot after each game, and snapshots
+    are also written to metrics_file if it is given. Players are banned,
+    games are seeded and checkpoints are kept as in round_robin.
+    '''
     os.makedirs(output_directory, exist_ok=True)
     out_dir = Path(output_directory)
+    players = list(movers)
     banned = set()
     movers = dict(movers)
     victories = Counter()
     max_time = Counter()
-    for i in range(num_games):
+    latencies = {}
+    done = 0
+    state = (load_checkpoint(out_dir, 'battle-royale', players)
+             if resume else None)
+    if state is not None:
+        done = state['games']
+        banned = set(state['banned'])
+        for player in banned:
+            del movers[player]
+        victories.update(player_dict(state['victories']))
+        max_time.update(player_dict(state['max_time']))
+        latencies = {p: Latencies.from_dict(l)
+                     for p, l in player_dict(state['latencies']).items()}
+    tracker = Progress(num_games - done, progress, metrics_file,
+                       label='battle royale')
+    for i in range(done, num_games):
         scores, times, record = game17(
-            movers, board_size=board_size, num_rounds=num_rounds)
+            movers, board_size=board_size, num_rounds=num_rounds,
+            seed=_game_seed(seed, i), backend=backend, latencies=latencies)
 
-        with open(out_dir / f'battle-royale-{i}.json', 'w') as mf:
-            json.dump(record, mf, cls=NumPyEncoder)
+        save_record(out_dir, f'battle-royale-{i}', record, archive)
         for player, ptime in times.items():
-            if time_threshold > 0 and ptime > time_threshold:
+            if _too_slow(player, times, latencies, time_threshold,
+                         ban_percentile):
                 del movers[player]
                 banned.add(player)
             max_time[player] = max(max_time[player], ptime)
         for player, score in scores.items():
             if player in movers and score == max(scores.values()):
-                victories[player] += 1
+                victories[int(player)] += 1
+        save_checkpoint(out_dir, 'battle-royale', players, {
+            'games': i + 1,
+            'banned': sorted(banned),
+            'victories': dict(victories),
+            'max_time': {int(p): t for p, t in max_time.items()},
+            'latencies': {int(p): l.to_dict() for p, l in latencies.items()}})
+        tracker.game_done(len(record['diffs']), banned)
 
     # expunge the banned
     for the_banned in banned:
@@ -189,33 +303,82 @@ def battle_royale(movers, output_directory, num_games=100, board_size=14,
     with open(out_dir / 'battle-royale-summary.txt', 'w') as br:
         winners = pd.DataFrame(
             {p: [str(victories.get(p, 'banned' if p in banned else 0)),
-                 max_time[p]]
-             for p in set(movers) | banned}, index=['games won', 'max time'])
+                 max_time[p]] + _latency_summary(latencies, p)
+             for p in set(movers) | banned},
+            index=['games won', 'max time'] + COLUMNS)
         br.write(winners.transpose().to_string() + '\n')
 
     return ranks
 
 
-def vs_zombies(movers, num_games=100, board_size=14, num_rounds=50):
-    'Run multiple competitions and return number of wins'
+def vs_zombies(movers, num_games=100, board_size=14, num_rounds=50,
+               seed=None, backend='numpy', progress=None, metrics_file=None,
+               latencies=None):
+    """
+    Run multiple competitions and return number of wins
+
+    If seed is given, game i is played with seed (seed, i), so every player
+    evaluated with the same seed faces the same boards. If progress is
+    given, it is called with a game17.telemetry snapshot after each game,
+    and snapshots are also written to metrics_file if it is given. The times
+    of the player's calls are counted in latencies, as in game17, if it is
+    given.
+    """
     if len(movers) != 1:
         raise ValueError(
                 f'vs_zombies passed {len(movers)} players. Should only be one')
     victories = Counter()
     max_time = Counter()
+    tracker = Progress(num_games, progress, metrics_file,
+                       label='vs zombies')
     for i in range(num_games):
         scores, times, record = game17(
-            movers, board_size=board_size, num_rounds=num_rounds)
+            movers, board_size=board_size, num_rounds=num_rounds,
+            seed=_game_seed(seed, i), backend=backend,
+            latencies=latencies)
 
         for player, score in scores.items():
             if player in movers and score == max(scores.values()):
                 max_time[player] = max(max_time[player], times[player])
                 victories[player] += 1
+        tracker.game_done(len(record['diffs']))
 
     return victories, max_time
 
 
-def game17(players, board_size=14, num_rounds=50):
+class RandomStreams(object):
+    """
+    Independent random number streams for the board, the tie breaks and each
+    zombie in a game. Two games with the same seed then get the same board,
+    turn order and zombie moves for as long as the games agree, even if the
+    players in them behave differently. Without a seed, everything comes from
+    numpy.random.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self._zombies = {}
+        if seed is None:
+            self.board = self.ties = np.random
+        else:
+            self.board = self._stream(0)
+            self.ties = self._stream(1)
+
+    def _stream(self, *key):
+        return np.random.default_rng(
+            np.random.SeedSequence(self.seed, spawn_key=key))
+
+    def zombie(self, owner):
+        'The stream for the zombie that is owner'
+        if self.seed is None:
+            return np.random
+        if owner not in self._zombies:
+            self._zombies[owner] = self._stream(2, int(owner))
+        return self._zombies[owner]
+
+
+def game17(players, board_size=14, num_rounds=50, seed=None,
+           backend='numpy', latencies=None):
     """
     Play a game of Game 17.
 
@@ -223,6 +386,19 @@ def game17(players, board_size=14, num_rounds=50):
     ----------
     players : dict of functions
         A function for each player of the game. Keys are player numbers.
+    seed : int or sequence of ints, optional
+        Seed for the board, turn order, tie breaks and zombies. Games with
+        the same seed are played on the same board in the same order. The
+        default is to use numpy.random.
+    backend : str or backend object, optional
+        Game engine backend, 'numpy', 'numba' or 'auto' (see
+        game17.backends). The default is 'numpy'.
+    latencies : dict, optional
+        If given, the wall clock and CPU time of every call to each player's
+        function is counted in latencies[player], a game17.latency.Latencies
+        that is added if it is missing. Players that run in another process
+        (those with a true charge_wall_time attribute) are charged their wall
+        clock time as CPU time, here and in times.
     display_board : bool, optional
         Whether to display the board after each turn. The default is True.
     display_counts : bool, optional
@@ -237,26 +413,42 @@ def game17(players, board_size=14, num_rounds=50):
         The average time (seconds) that calls to that player's function took
 
     """
-    owners, numbers = create_board(board_size)
+    backend = get_backend(backend)
+    streams = RandomStreams(seed)
+    owners, numbers = create_board(board_size, streams.board)
     record = {'owners': np.array(owners),
               'numbers': np.array(numbers),
               'diffs': []}
     all_owners = list(set(owners.flatten()))
-    np.random.shuffle(all_owners)
+    streams.board.shuffle(all_owners)
+    view = GameView(owners, numbers)
+    # players only ever see their own copies of the board, so they can't
+    # change the real board, or the features that other players see
+    player_views = {}
     movers = {}
     for owner, get_mover in players.items():
+        kwargs = {}
+        if accepts_view(get_mover):
+            player_views[owner] = kwargs['view'] = GameView(
+                np.array(owners), np.array(numbers))
         movers[owner] = get_mover(
-                owner=owner, owners=owners, numbers=numbers,
-                turn_order=all_owners, num_rounds=num_rounds)
+                owner=owner, owners=np.array(owners),
+                numbers=np.array(numbers), turn_order=all_owners,
+                num_rounds=num_rounds, **kwargs)
     times = defaultdict(list)
     for round in range(num_rounds):
         for owner in all_owners:
-            if owner not in set(owners.flatten()):
+            if owner not in view.squares():
                 continue
             if owner in movers:
                 safe_owners = np.array(owners)
                 safe_numbers = np.array(numbers)
+                if owner in player_views:
+                    # not the mover's arrays, which it may change
+                    player_views[owner].update(
+                        np.array(owners), np.array(numbers))
                 try:
+                    start_wall = time.perf_counter()
                     start = time.process_time()
                     moves = movers[owner](safe_owners, safe_numbers)
                     end = time.process_time()
@@ -265,16 +457,28 @@ def game17(players, board_size=14, num_rounds=50):
                 except Exception:
                     moves = []
                     end = time.process_time()
-                times[owner].append(end - start)
-            else:
-                rounds_left = num_rounds - round - 1
-                moves = make_moves_zombie(owner, rounds_left, owners, numbers)
+                end_wall = time.perf_counter()
+                cpu = end - start
+                if getattr(movers[owner], 'charge_wall_time', False):
+                    cpu = end_wall - start_wall
+                times[owner].append(cpu)
+                if latencies is not None:
+                    if owner not in latencies:
+                        latencies[owner] = Latencies()
+                    latencies[owner].record(end_wall - start_wall, cpu)
             before_owners = np.array(owners)
             before_numbers = np.array(numbers)
             try:
                 safe_owners = np.array(owners)
                 safe_numbers = np.array(numbers)
-                update_board(owner, moves, owners, numbers)
+                if owner in movers:
+                    backend.update_board(
+                        owner, moves, owners, numbers, streams.ties)
+                else:
+                    rounds_left = num_rounds - round - 1
+                    backend.zombie_turn(
+                        owner, rounds_left, owners, numbers,
+                        streams.zombie(owner), streams.ties, view)
             except KeyboardInterrupt:
                 raise
             except Exception:
@@ -282,12 +486,13 @@ def game17(players, board_size=14, num_rounds=50):
                 numbers = safe_numbers
                 print(f'skipping player {owner}, '
                       'because they broke update_board')
+            view.update(owners, numbers)
             record['diffs'].append({
                 'round': round,
                 'owner': owner,
-                'owners': board_diff(before_owners, owners),
-                'numbers': board_diff(before_numbers, numbers)})
-            num_players_left = len(set(owners[numbers > 0].flatten()))
+                'owners': backend.board_diff(before_owners, owners),
+                'numbers': backend.board_diff(before_numbers, numbers)})
+            num_players_left = len(view.pieces())
             if num_players_left == 1:
                 break
         if num_players_left == 1:
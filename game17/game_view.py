@@ -0,0 +1,122 @@
+import inspect
+from types import MappingProxyType
+
+import numpy as np
+
+from .game17 import neighbour_table
+
+
+def accepts_view(func):
+    'Whether func can be passed a GameView as the view keyword argument'
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == 'view' or p.kind == p.VAR_KEYWORD
+               for p in parameters)
+
+
+class GameView(object):
+    """
+    Features of the board that movers commonly need, computed on demand and
+    remembered until the board changes. The game engine calls update after
+    every turn, so each feature is computed at most once per turn no matter
+    how many movers ask for it.
+
+    All arrays and dicts returned by a GameView are read only. Each player is
+    given a view of its own copy of the board, so that it can't change the
+    real board or the features other players see.
+    """
+
+    def __init__(self, owners, numbers):
+        self.update(owners, numbers)
+
+    def update(self, owners, numbers):
+        'Point the view at the current board and forget cached features'
+        self.owners = owners.view()
+        self.owners.setflags(write=False)
+        self.numbers = numbers.view()
+        self.numbers.setflags(write=False)
+        self.board_size = owners.shape[0]
+        self._cache = {}
+
+    def _memo(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def _owned_squares(self):
+        'Flat indices of non-empty squares, grouped by owner'
+        def compute():
+            occupied = np.flatnonzero(self.numbers > 0)
+            occupiers = self.owners.reshape(-1)[occupied]
+            order = np.argsort(occupiers, kind='stable')
+            return occupiers[order], occupied[order]
+        return self._memo('owned_squares', compute)
+
+    def owned_pieces(self, owner):
+        """
+        Find the pieces owned by owner, as find_owned_pieces does.
+
+        Parameters
+        ----------
+        owner : int
+            Owner to find the pieces for.
+
+        Returns
+        -------
+        owned_pieces : n x 3 array of ints
+            Where n is the number of non-empty squares owned by the owner.
+            Each row contains the i-coordinate, the j-coordinate, and the
+            number of pieces in that square.
+
+        """
+        def compute():
+            occupiers, occupied = self._owned_squares()
+            start, end = np.searchsorted(occupiers, [owner, owner + 1])
+            squares = occupied[start:end]
+            from_i, from_j = np.divmod(squares, self.board_size)
+            pieces = np.vstack(
+                (from_i, from_j, self.numbers.reshape(-1)[squares])).T
+            pieces.setflags(write=False)
+            return pieces
+        return self._memo(('owned_pieces', owner), compute)
+
+    def neighbour_numbers(self):
+        'Number of pieces to the n, s, e, and w of each square (flat index)'
+        def compute():
+            numbers = self.numbers.reshape(-1)[
+                neighbour_table(self.board_size)]
+            numbers.setflags(write=False)
+            return numbers
+        return self._memo('neighbour_numbers', compute)
+
+    def neighbour_owners(self):
+        'Owners of the squares to the n, s, e, and w of each square'
+        def compute():
+            owners = self.owners.reshape(-1)[
+                neighbour_table(self.board_size)]
+            owners.setflags(write=False)
+            return owners
+        return self._memo('neighbour_owners', compute)
+
+    def squares(self):
+        'Read only dict from each owner on the board to its number of squares'
+        def compute():
+            owners, counts = np.unique(self.owners, return_counts=True)
+            return MappingProxyType(
+                dict(zip(owners.tolist(), counts.tolist())))
+        return self._memo('squares', compute)
+
+    def pieces(self):
+        'Read only dict from each owner with pieces to its number of pieces'
+        def compute():
+            occupiers, occupied = self._owned_squares()
+            if len(occupied) == 0:
+                return MappingProxyType({})
+            owners, starts = np.unique(occupiers, return_index=True)
+            totals = np.add.reduceat(
+                self.numbers.reshape(-1)[occupied], starts)
+            return MappingProxyType(
+                dict(zip(owners.tolist(), totals.tolist())))
+        return self._memo('pieces', compute)
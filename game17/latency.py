@@ -0,0 +1,142 @@
+"""
+Histograms of how long players take to move.
+
+Every call to a player's mover is counted in a logarithmically binned
+histogram, so percentiles of millions of calls can be kept in a few hundred
+integers. Percentiles are read off as the top of the bin they fall in (but
+no more than the largest time recorded), which is at most 12% above the true
+value. That is fine for reports, but not for deciding whether a player is
+too slow, so LatencyHistogram.exceeds compares a percentile with a time limit
+using the bin edges instead.
+"""
+
+import math
+
+MIN_TIME = 1e-7
+BINS_PER_DECADE = 20
+NUM_BINS = 10 * BINS_PER_DECADE + 2
+PERCENTILES = (50, 95, 99)
+COLUMNS = [f'{clock} {stat}' for clock in ('cpu', 'wall')
+           for stat in [f'p{q}' for q in PERCENTILES] + ['max']]
+
+
+def _upper_edge(b):
+    return MIN_TIME * 10 ** (b / BINS_PER_DECADE)
+
+
+class LatencyHistogram(object):
+    'Histogram of times in seconds, from 0.1 microseconds to 1000 seconds'
+
+    def __init__(self):
+        self.counts = [0] * NUM_BINS
+        self.count = 0
+        self.max = 0.
+
+    def record(self, seconds):
+        'Count one time'
+        if seconds <= MIN_TIME:
+            b = 0
+        else:
+            b = min(math.ceil(math.log10(seconds / MIN_TIME) *
+                              BINS_PER_DECADE), NUM_BINS - 1)
+        self.counts[b] += 1
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        'Add the counts of another histogram to this one'
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        'Time that q percent of the times are no more than (nan if empty)'
+        if self.count == 0:
+            return math.nan
+        rank = max(math.ceil(q / 100 * self.count), 1)
+        seen = 0
+        for b, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_upper_edge(b), self.max)
+        return self.max
+
+    def exceeds(self, q, seconds):
+        """
+        Whether more than 100 - q percent of the times are more than seconds,
+        that is, whether percentile(q) is more than seconds.
+
+        Only times in bins that start at or above seconds are counted as more
+        than seconds, so the answer is exact when seconds is a bin edge (such
+        as 0.01) or no more than the largest time. Otherwise the times in the
+        bin that seconds falls in are given the benefit of the doubt.
+        """
+        if self.count == 0 or seconds >= self.max:
+            return False
+        rank = max(math.ceil(q / 100 * self.count), 1)
+        # bin b holds the times above the top of bin b - 1, up to its own top
+        at_most = sum(count for b, count in enumerate(self.counts)
+                      if b == 0 or _upper_edge(b - 1) < seconds)
+        return at_most < rank
+
+    def to_dict(self):
+        'Dict of the counts, from which from_dict can rebuild the histogram'
+        return {'counts': self.counts, 'count': self.count, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, state):
+        'Histogram with the counts in a dict from to_dict'
+        histogram = cls()
+        histogram.counts = list(state['counts'])
+        histogram.count = state['count']
+        histogram.max = state['max']
+        return histogram
+
+    def summary(self):
+        'Dict of the p50, p95, p99 and max times'
+        summary = {f'p{q}': self.percentile(q) for q in PERCENTILES}
+        summary['max'] = self.max if self.count else math.nan
+        return summary
+
+
+class Latencies(object):
+    'Wall clock and CPU (process) time histograms for one player'
+
+    def __init__(self):
+        self.wall = LatencyHistogram()
+        self.cpu = LatencyHistogram()
+
+    def record(self, wall, cpu):
+        'Count one call to the player'
+        self.wall.record(wall)
+        self.cpu.record(cpu)
+
+    def merge(self, other):
+        'Add the counts of another player\'s histograms to this one'
+        self.wall.merge(other.wall)
+        self.cpu.merge(other.cpu)
+
+    def to_dict(self):
+        'Dict of the counts, from which from_dict can rebuild the latencies'
+        return {'wall': self.wall.to_dict(), 'cpu': self.cpu.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        'Latencies with the counts in a dict from to_dict'
+        latencies = cls()
+        latencies.wall = LatencyHistogram.from_dict(state['wall'])
+        latencies.cpu = LatencyHistogram.from_dict(state['cpu'])
+        return latencies
+
+    def summary(self):
+        'Dict of the cpu and wall p50, p95, p99 and max times (see COLUMNS)'
+        return {f'{clock} {stat}': value
+                for clock in ('cpu', 'wall')
+                for stat, value in getattr(self, clock).summary().items()}
+
+
+def merge_latencies(latencies, others):
+    'Merge a dict of Latencies into another, keyed by player'
+    for player, other in others.items():
+        latencies.setdefault(player, Latencies()).merge(other)
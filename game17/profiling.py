@@ -0,0 +1,237 @@
+"""
+Find out where a player's time goes.
+
+The player plays the same seeded games against zombies three times. The
+first time, each of its moves is timed, with the number of squares it held,
+to show how its move time grows with its territory. The second time, its
+moves are run under cProfile to find the functions it spends its time in and
+how often it calls them each turn. The third time, its moves are run under
+tracemalloc to find the peak memory each turn uses on top of what was
+already allocated (tracemalloc slows everything down, so it is kept out of
+the timings). Only the player's own moves are measured, not the game engine
+or the zombies.
+"""
+
+import cProfile
+from pathlib import Path
+import pstats
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .game_runners import game17
+from .game_view import accepts_view
+
+
+def _instrument(get_mover, on_call):
+    'get_mover function whose movers are called through on_call'
+    wants_view = accepts_view(get_mover)
+
+    def instrumented(view=None, **kwargs):
+        if wants_view:
+            kwargs['view'] = view
+        mover = get_mover(**kwargs)
+        owner = kwargs['owner']
+        return lambda owners, numbers: on_call(mover, owner, owners, numbers)
+    return instrumented
+
+
+def _territory_bins(squares):
+    'Label each number of squares with its power of two range, eg. 4-7'
+    low = 2 ** np.floor(np.log2(np.maximum(squares, 1))).astype(int)
+    return [f'{lo}' if lo == 1 else f'{lo}-{2 * lo - 1}' for lo in low], low
+
+
+class BotProfile(object):
+    """
+    Where a player's time went, as found by profile.
+
+    Attributes
+    ----------
+    turns : int
+        Number of moves the player made in the profiled games.
+    turn_times : pandas DataFrame
+        One row per move, with the game, squares held, and wall clock and
+        CPU seconds taken.
+    scaling : pandas DataFrame
+        Move time statistics (ms) for ranges of squares held.
+    exponent : float
+        k in CPU time per move ~ squares ** k, fitted by least squares on
+        log scales (nan if it can't be fitted).
+    functions : pandas DataFrame
+        Calls per turn, own time and cumulative time (seconds, and ms per
+        turn) of every function called by the player, slowest first.
+    peak : pandas Series
+        Peak bytes allocated during each move, on top of those already
+        allocated when it started. This is the most memory the move needed
+        at once, not the total it allocated.
+    retained : int
+        Bytes allocated by the player and still held after the last game.
+
+    """
+
+    def report(self, top=20):
+        'Text report of the profile, listing the top slowest functions'
+        peak = self.peak
+        lines = [
+            f'{self.turns} turns, '
+            f'{self.turn_times.cpu.mean() * 1000:.3f} ms CPU per turn '
+            f'(p95 {self.turn_times.cpu.quantile(0.95) * 1000:.3f} ms, '
+            f'max {self.turn_times.cpu.max() * 1000:.3f} ms)',
+            '',
+            'Functions by cumulative time:',
+            self.functions.head(top).to_string(),
+            '',
+            f'Peak memory per turn: mean {peak.mean() / 1024:.1f} KiB, '
+            f'p95 {peak.quantile(0.95) / 1024:.1f} KiB, '
+            f'max {peak.max() / 1024:.1f} KiB; '
+            f'{self.retained / 1024:.1f} KiB retained after the last game',
+            '',
+            'Move time (ms) by squares held:',
+            self.scaling.to_string(),
+            '',
+            f'CPU time per move grows as squares ** {self.exponent:.2f}']
+        return '\n'.join(lines) + '\n'
+
+
+def _timing_pass(get_mover, seeds, kwargs):
+    rows = []
+
+    def on_call(mover, owner, owners, numbers):
+        squares = int((owners == owner).sum())
+        start_wall = time.perf_counter()
+        start = time.process_time()
+        try:
+            return mover(owners, numbers)
+        finally:
+            rows.append((game, squares, time.perf_counter() - start_wall,
+                         time.process_time() - start))
+
+    instrumented = _instrument(get_mover, on_call)
+    for game, seed in enumerate(seeds):
+        game17({0: instrumented}, seed=seed, **kwargs)
+    return pd.DataFrame(rows, columns=['game', 'squares', 'wall', 'cpu'])
+
+
+def _profile_pass(get_mover, seeds, kwargs):
+    profiler = cProfile.Profile()
+    turns = 0
+
+    def on_call(mover, owner, owners, numbers):
+        nonlocal turns
+        turns += 1
+        profiler.enable()
+        try:
+            return mover(owners, numbers)
+        finally:
+            profiler.disable()
+
+    instrumented = _instrument(get_mover, on_call)
+    for seed in seeds:
+        game17({0: instrumented}, seed=seed, **kwargs)
+    return profiler, turns
+
+
+def _memory_pass(get_mover, seeds, kwargs):
+    peak = []
+
+    def on_call(mover, owner, owners, numbers):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            return mover(owners, numbers)
+        finally:
+            peak.append(tracemalloc.get_traced_memory()[1] - before)
+
+    instrumented = _instrument(get_mover, on_call)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for seed in seeds:
+            game17({0: instrumented}, seed=seed, **kwargs)
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return pd.Series(peak, dtype=np.int64), retained
+
+
+def _function_table(profiler, turns):
+    rows = []
+    for (path, line, name), (_, calls, own, cumulative, _) in \
+            pstats.Stats(profiler).stats.items():
+        if '_lsprof' in name:
+            continue
+        if line:
+            name = f'{name} ({Path(path).name}:{line})'
+        rows.append((name, calls / turns, own, cumulative,
+                     cumulative / turns * 1000))
+    functions = pd.DataFrame(rows, columns=[
+        'function', 'calls/turn', 'own s', 'cumulative s', 'ms/turn'])
+    functions = functions.sort_values('cumulative s', ascending=False)
+    return functions.set_index('function')
+
+
+def _scaling_table(turn_times):
+    labels, low = _territory_bins(turn_times.squares.to_numpy())
+    ms = turn_times[['cpu', 'wall']] * 1000
+    groups = ms.groupby([low, labels])
+    scaling = pd.DataFrame({
+        'turns': groups.cpu.count(),
+        'cpu mean': groups.cpu.mean(),
+        'cpu p95': groups.cpu.quantile(0.95),
+        'cpu max': groups.cpu.max(),
+        'wall mean': groups.wall.mean()})
+    scaling.index = scaling.index.droplevel(0)
+    scaling.index.name = 'squares'
+    return scaling
+
+
+def _exponent(turn_times):
+    timed = turn_times[(turn_times.cpu > 0) & (turn_times.squares > 0)]
+    if timed.squares.nunique() < 2:
+        return np.nan
+    slope, _ = np.polyfit(np.log(timed.squares), np.log(timed.cpu), 1)
+    return slope
+
+
+def profile(get_mover, num_games=5, board_size=14, num_rounds=50, seed=0,
+            backend='numpy'):
+    """
+    Profile a player over seeded games against zombies.
+
+    Parameters
+    ----------
+    get_mover : function
+        get_mover function of the player (see README).
+    num_games : int, optional
+        Number of games. The default is 5.
+    board_size : int, optional
+        Size of the board. The default is 14.
+    num_rounds : int, optional
+        Number of rounds in each game. The default is 50.
+    seed : int, optional
+        Game i is played with seed (seed, i). The default is 0.
+    backend : str or backend object, optional
+        Game engine backend (see game17.backends). The default is 'numpy'.
+
+    Returns
+    -------
+    BotProfile
+        Where the player's time went.
+
+    """
+    seeds = [(seed, i) for i in range(num_games)]
+    kwargs = {'board_size': board_size, 'num_rounds': num_rounds,
+              'backend': backend}
+    result = BotProfile()
+    result.turn_times = _timing_pass(get_mover, seeds, kwargs)
+    profiler, profiled_turns = _profile_pass(get_mover, seeds, kwargs)
+    result.peak, result.retained = _memory_pass(get_mover, seeds, kwargs)
+    result.turns = len(result.turn_times)
+    # bots that use numpy.random may not make as many moves the second time
+    result.functions = _function_table(profiler, max(profiled_turns, 1))
+    result.scaling = _scaling_table(result.turn_times)
+    result.exponent = _exponent(result.turn_times)
+    return result
@@ -0,0 +1,196 @@
+"""
+Play out the rest of a game quickly, for Monte Carlo players.
+
+A rollout starts from any board, part way through a round, and plays the
+remaining turns with the player's own policy and zombie (or other)
+opponents. Unlike game17, it does not create a board, record diffs, time
+the players or protect the board from them, and it doesn't print a message
+when a player's moves are skipped. Many rollouts can be played at once on
+a stack of boards, with each zombie moving on every board in one step.
+"""
+
+import contextlib
+import inspect
+import io
+from functools import partial
+
+import numpy as np
+
+from .backends import get_backend
+from .game17 import neighbour_table
+
+
+def _with_rng(make_moves, rng):
+    'Give make_moves the rollout rng, if it takes one'
+    try:
+        parameters = inspect.signature(make_moves).parameters
+    except (TypeError, ValueError):
+        return make_moves
+    if 'rng' in parameters:
+        return partial(make_moves, rng=rng)
+    return make_moves
+
+
+def _players(owner, policy, turn_order, opponents, rng):
+    'make_moves function for each player that is not a zombie'
+    if opponents is None:
+        opponents = {}
+    elif callable(opponents):
+        opponents = {o: opponents for o in turn_order if o != owner}
+    make_moves = {o: _with_rng(m, rng) for o, m in opponents.items()}
+    make_moves[owner] = _with_rng(policy, rng)
+    return make_moves
+
+
+def rollout(owner, policy, owners, numbers, turn_order, num_rounds,
+            position=0, opponents=None, rng=None, backend='numpy'):
+    """
+    Play out a game from the current state.
+
+    Parameters
+    ----------
+    owner : int
+        Player number of the player following policy.
+    policy : function
+        make_moves function (see README) that chooses owner's moves.
+    owners : square array of ints
+        Current owner of each square. It is not changed.
+    numbers : square array of ints
+        Current number of pieces in each square. It is not changed.
+    turn_order : list of ints
+        Order of turns in each round.
+    num_rounds : int
+        Number of rounds to play, the first starting at position.
+    position : int, optional
+        Index in turn_order of the next player to move. The default is 0.
+    opponents : function or dict of functions, optional
+        make_moves function for every other player, or a dict of them
+        keyed by player number. Players without one are zombies. The
+        default is for all other players to be zombies.
+    rng : numpy Generator, optional
+        Source of randomness for zombies, ties and any make_moves function
+        that takes an rng argument. The default is a new Generator.
+    backend : str or backend object, optional
+        Game engine backend (see game17.backends). The default is 'numpy'.
+
+    Returns
+    -------
+    owners : square array of ints
+        The owner of each square at the end of the game.
+    numbers : square array of ints
+        The number of pieces in each square at the end of the game.
+
+    """
+    backend = get_backend(backend)
+    rng = np.random.default_rng() if rng is None else rng
+    owners = np.array(owners)
+    numbers = np.array(numbers)
+    make_moves = _players(owner, policy, turn_order, opponents, rng)
+    # skip messages would swamp the output of a player doing many rollouts
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    for round in range(num_rounds):
+        rounds_left = num_rounds - round - 1
+        for mover in turn_order[position if round == 0 else 0:]:
+            if not (owners == mover).any():
+                continue
+            if mover in make_moves:
+                moves = make_moves[mover](mover, rounds_left, owners, numbers)
+                with quiet:
+                    backend.update_board(mover, moves, owners, numbers, rng)
+            else:
+                with quiet:
+                    backend.zombie_turn(
+                        mover, rounds_left, owners, numbers, rng, rng)
+            if len(np.unique(owners[numbers > 0])) == 1:
+                return owners, numbers
+    return owners, numbers
+
+
+def _zombie_turns(zombie, owners, numbers, playing, table, rng):
+    """
+    Take zombie's turn on every board in a stack that is still being played.
+    Every piece it owns moves in a random direction, as in zombie.make_moves,
+    and ties are broken as in update_board.
+    """
+    flat_owners = owners.reshape(-1)
+    flat_numbers = numbers.reshape(-1)
+    squares = np.flatnonzero(
+        ((owners == zombie) & (numbers > 0) & playing[:, None, None]).ravel())
+    if not len(squares):
+        return
+    to_move = rng.multinomial(flat_numbers[squares], [0.25]*4)
+    size = table.shape[0]
+    board, square = np.divmod(squares, size)
+    incoming = np.zeros(flat_numbers.size, dtype=np.int64)
+    np.add.at(incoming, (board[:, None] * size + table[square]).ravel(),
+              to_move.ravel())
+    # zombies move all of their pieces
+    flat_numbers[squares] = 0
+    arrived = np.flatnonzero(incoming)
+    staying = flat_numbers[arrived]
+    taken = incoming[arrived] > staying
+    tied = incoming[arrived] == staying
+    taken[tied] = rng.random(tied.sum()) < 0.5
+    flat_numbers[arrived] += incoming[arrived].astype(flat_numbers.dtype)
+    flat_owners[arrived[taken]] = zombie
+
+
+def _decided(owners, numbers):
+    'Whether only one player has pieces left, for each board in a stack'
+    pieces = numbers > 0
+    lowest = owners.min(axis=(1, 2), where=pieces,
+                        initial=np.iinfo(owners.dtype).max)
+    highest = owners.max(axis=(1, 2), where=pieces,
+                         initial=np.iinfo(owners.dtype).min)
+    return lowest >= highest
+
+
+def rollouts(owner, policy, owners, numbers, turn_order, num_rounds,
+             num_rollouts, position=0, opponents=None, rng=None,
+             backend='numpy'):
+    """
+    Play out a game from the current state many times at once.
+
+    Takes the same parameters as rollout, plus num_rollouts, the number of
+    games to play, except that rng must be a numpy Generator. The boards
+    of all of the games are stacked, and each zombie takes its turn on all
+    of them at once, so zombies cost about the same however many games
+    are played. policy and any opponents are still called for each board,
+    and their moves applied with backend. The games are played as rollout
+    would play them, but the random numbers are drawn in a different
+    order, so they are not the same games as rollout plays with the same
+    rng.
+
+    Returns
+    -------
+    array of ints
+        The number of squares owned by owner at the end of each game.
+
+    """
+    backend = get_backend(backend)
+    rng = np.random.default_rng() if rng is None else rng
+    owners = np.repeat(np.array(owners)[np.newaxis], num_rollouts, axis=0)
+    numbers = np.repeat(np.array(numbers)[np.newaxis], num_rollouts, axis=0)
+    make_moves = _players(owner, policy, turn_order, opponents, rng)
+    table = neighbour_table(owners.shape[1])
+    playing = np.ones(num_rollouts, dtype=bool)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    for round in range(num_rounds):
+        rounds_left = num_rounds - round - 1
+        for mover in turn_order[position if round == 0 else 0:]:
+            holding = playing & (owners == mover).any(axis=(1, 2))
+            if not holding.any():
+                continue
+            if mover in make_moves:
+                for k in np.flatnonzero(holding):
+                    moves = make_moves[mover](
+                        mover, rounds_left, owners[k], numbers[k])
+                    with quiet:
+                        backend.update_board(
+                            mover, moves, owners[k], numbers[k], rng)
+            else:
+                _zombie_turns(mover, owners, numbers, holding, table, rng)
+            playing &= ~_decided(owners, numbers)
+            if not playing.any():
+                return (owners == owner).sum(axis=(1, 2))
+    return (owners == owner).sum(axis=(1, 2))
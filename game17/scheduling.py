@@ -0,0 +1,286 @@
+"""
+Play many games at once in a pool of worker processes.
+
+Movers are usually closures or come from modules loaded from file, so they
+can't be sent to workers. Instead, workers are forked from this process and
+inherit the movers. With one process, or where fork isn't available (eg.
+Windows), each task is run in this process as it is submitted.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from itertools import combinations
+import multiprocessing
+import os
+
+import numpy as np
+
+from .checkpoint import load_checkpoint
+from .game_runners import (
+    _game_seed, _group_suffix, game17, round_robin, vs_zombies)
+from .latency import COLUMNS, Latencies, merge_latencies
+from .telemetry import Progress
+
+_movers = {}
+
+
+def _init_worker(movers):
+    global _movers
+    _movers = movers
+    # forked workers inherit numpy.random's state, so unseeded games would
+    # be the same in every worker
+    np.random.seed()
+    # external bots must not share their parent's process, so start afresh
+    for get_mover in movers.values():
+        bot = getattr(get_mover, 'bot', None)
+        if bot is not None:
+            bot.process = None
+            bot.latencies = []
+
+
+def _call(task, *args):
+    return task(_movers, *args)
+
+
+class _SerialPool(object):
+    'Stands in for a process pool by running tasks as they are submitted'
+
+    def __init__(self, movers):
+        self.movers = movers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def submit(self, task, *args):
+        future = Future()
+        try:
+            future.set_result(task(self.movers, *args))
+        except KeyboardInterrupt:
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+        return future
+
+
+def game_pool(movers, processes=None):
+    """
+    Pool of processes that know the movers.
+
+    Parameters
+    ----------
+    movers : dict of functions
+        get_mover function for each player.
+    processes : int, optional
+        Number of worker processes. The default is one per CPU.
+
+    Returns
+    -------
+    pool
+        A context manager with a method submit(task, *args) that calls
+        task(movers, *args) in a worker and returns a
+        concurrent.futures.Future of the result. task must be a module
+        level function.
+
+    """
+    if processes == 1 or \
+            'fork' not in multiprocessing.get_all_start_methods():
+        return _SerialPool(movers)
+    return _process_pool(movers, processes)
+
+
+def _process_pool(movers, processes):
+    pool = ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_worker, initargs=(movers,))
+    submit = pool.submit
+    pool.submit = lambda task, *args: submit(_call, task, *args)
+    return pool
+
+
+def _play(movers, players, seed, kwargs):
+    latencies = {}
+    scores, times, record = game17(
+        {p: movers[p] for p in players}, seed=seed, latencies=latencies,
+        **kwargs)
+    return scores, times, record, latencies
+
+
+def _played(future, latencies):
+    'Result of a game from _play, with its latencies merged into latencies'
+    scores, times, record, game_latencies = future.result()
+    merge_latencies(latencies, game_latencies)
+    return scores, times, record
+
+
+def run_off(movers, ranks, output_directory, board_size=14, num_rounds=50,
+            time_threshold=0.01, backend='numpy', archive=None,
+            progress=None, metrics_file=None, processes=None,
+            ban_percentile=None, seed=None, resume=False):
+    """
+    Break the ties in ranks with round-robin competitions, playing the games
+    of all of them in one pool of workers.
+
+    The games of the largest groups are started first, since they take
+    longest, and workers move on to the next game of any group as they
+    finish. The results are the same as calling round_robin for each group
+    in turn.
+
+    Parameters
+    ----------
+    movers : dict of functions
+        get_mover function for each player.
+    ranks : list of sets
+        Players in order of rank, as returned by battle_royale.
+    output_directory : str or Path
+        Where round_robin writes its results.
+    processes : int, optional
+        Number of worker processes. The default is one per CPU. Use 1 to
+        play the games in this process.
+    seed : int, optional
+        If given, group g is played with seed (seed, g).
+
+    The other parameters are passed on to round_robin.
+
+    Returns
+    -------
+    list of sets
+        ranks, with each tied group replaced by its round-robin ranking.
+
+    """
+    groups = {group: {p: m for p, m in movers.items() if p in rank}
+              for group, rank in enumerate(ranks) if len(rank) > 1}
+    kwargs = {'board_size': board_size, 'num_rounds': num_rounds,
+              'backend': backend}
+    futures = {}
+    with game_pool(movers, processes) as pool:
+        if processes != 1:
+            for group in sorted(groups, key=lambda g: -len(groups[g])):
+                group_seed = _game_seed(seed, group)
+                pairs = list(combinations(groups[group], 2))
+                state = load_checkpoint(
+                    output_directory, f'round-robin{_group_suffix(group)}',
+                    groups[group]) if resume else None
+                done = 0 if state is None else state['games']
+                for k, pair in enumerate(pairs[done:], done):
+                    futures[group, pair] = pool.submit(
+                        _play, pair, _game_seed(group_seed, k), kwargs)
+
+        fine_ranks = []
+        for group, rank in enumerate(ranks):
+            if group not in groups:
+                fine_ranks.append(rank)
+                continue
+            play = None
+            if futures:
+                def play(pair, latencies, game_seed):
+                    return _played(futures[group, pair], latencies)
+            fine_ranks.extend(round_robin(
+                groups[group], output_directory, board_size, num_rounds,
+                time_threshold, group, backend, archive, progress,
+                metrics_file, play, ban_percentile, _game_seed(seed, group),
+                resume))
+            for (other_group, _), future in futures.items():
+                if other_group == group:
+                    future.cancel()
+    return fine_ranks
+
+
+def _vs_zombies(movers, player, kwargs):
+    last = {}
+    latencies = {}
+    victories, max_time = vs_zombies(
+        {0: movers[player]}, progress=last.update, latencies=latencies,
+        **kwargs)
+    summary = latencies.get(0, Latencies()).summary()
+    return (victories[0], max_time[0], last.get('turns completed', 0),
+            [summary[column] for column in COLUMNS])
+
+
+def all_vs_zombies(movers, output, num_games=100, board_size=14,
+                   num_rounds=50, seed=0, backend='numpy', processes=None,
+                   progress=None, metrics_file=None):
+    """
+    Play every player against zombies, one player per worker at a time.
+
+    Every player is given the same seed, so they all face the same boards.
+    Each player's result is written to output as soon as it is known, and a
+    player whose games fail is reported without holding up the others. If a
+    player kills its worker process (eg. with os._exit or a segfault), the
+    players that were unfinished are played again with a worker each, so
+    only the culprit fails. With one process, that would kill this process.
+
+    Parameters
+    ----------
+    movers : dict of functions
+        get_mover function for each player.
+    output : file object
+        Where to write a tab separated line of player, num_wins, max_time
+        and the latency percentiles (game17.latency.COLUMNS) for each
+        player, in the order they finish.
+    num_games : int, optional
+        Number of games for each player. The default is 100.
+    seed : int, optional
+        Seed for the games (see vs_zombies). The default is 0.
+    processes : int, optional
+        Number of worker processes. The default is one per CPU. Use 1 to
+        play the games in this process.
+    progress : function, optional
+        Called with a game17.telemetry snapshot as each player finishes,
+        and snapshots are also written to metrics_file if it is given.
+
+    The other parameters are passed on to vs_zombies.
+
+    Returns
+    -------
+    dict
+        The exception raised for each player whose games failed.
+
+    """
+    kwargs = {'num_games': num_games, 'board_size': board_size,
+              'num_rounds': num_rounds, 'seed': seed, 'backend': backend}
+    tracker = Progress(len(movers) * num_games, progress, metrics_file,
+                       label='vs zombies')
+    failures = {}
+
+    def finished(player, future):
+        try:
+            wins, max_time, turns, percentiles = future.result()
+        except KeyboardInterrupt:
+            raise
+        except BaseException as err:
+            failures[player] = err
+            tracker.game_done(0, games=num_games, failed=failures)
+            return
+        output.write('\t'.join(map(str, [player, wins, max_time] +
+                                    percentiles)) + '\n')
+        output.flush()
+        tracker.game_done(turns, games=num_games, failed=failures)
+
+    crashed = []
+    with game_pool(movers, processes) as pool:
+        futures = {pool.submit(_vs_zombies, player, kwargs): player
+                   for player in movers}
+        for future in as_completed(futures):
+            if isinstance(future.exception(), BrokenProcessPool):
+                # a worker died, and took every unfinished player with it
+                crashed.append(futures[future])
+            else:
+                finished(futures[future], future)
+    # play those again with a worker each, so that a player that kills its
+    # worker again only fails itself
+    width = processes or os.cpu_count()
+    for start in range(0, len(crashed), width):
+        players = crashed[start:start + width]
+        pools = [_process_pool(movers, 1) for _ in players]
+        try:
+            futures = {pool.submit(_vs_zombies, player, kwargs): player
+                       for pool, player in zip(pools, players)}
+            for future in as_completed(futures):
+                finished(futures[future], future)
+        finally:
+            for pool in pools:
+                pool.shutdown()
+    return failures
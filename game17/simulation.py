@@ -0,0 +1,134 @@
+import numpy as np
+
+from .game17 import moves_to_array, neighbour_table
+
+
+class SimulationBoard(object):
+    """
+    A copy of the board for looking ahead. Moves are applied with push and
+    taken back with pop. Only the squares that a push touches are saved and
+    restored, so pushing and popping a few moves costs about the same on any
+    size of board, and nothing is printed.
+
+    Moves follow the rules of game17.update_board, except that a player's
+    move is not applied (push returns False) instead of being skipped with a
+    message. Ties are broken according to ties:
+
+        'random'    a fair coin toss using rng (the default)
+        'defender'  the square stays with its previous owner
+        'attacker'  the square goes to the player who moved
+
+    Parameters
+    ----------
+    owners : square array of ints
+        Current owner of each square. It is copied.
+    numbers : square array of ints
+        Current number of pieces in each square. It is copied.
+    ties : str, optional
+        How ties are broken. The default is 'random'.
+    rng : numpy Generator, optional
+        Source of randomness for 'random' ties. The default is a new
+        Generator.
+
+    Attributes
+    ----------
+    owners, numbers : square arrays of ints
+        The simulated board. Read, but don't change, them between pushes.
+
+    """
+
+    def __init__(self, owners, numbers, ties='random', rng=None):
+        if ties not in ('random', 'defender', 'attacker'):
+            raise ValueError(f'unknown tie rule {ties}')
+        self.owners = np.array(owners)
+        self.numbers = np.array(numbers)
+        self.board_size = self.owners.shape[0]
+        self.ties = ties
+        self.rng = np.random.default_rng() if rng is None else rng
+        self._table = neighbour_table(self.board_size)
+        self._undo = []
+
+    @property
+    def depth(self):
+        'Number of pushes that have not been popped'
+        return len(self._undo)
+
+    def push(self, owner, moves):
+        """
+        Apply the moves of owner.
+
+        Parameters
+        ----------
+        owner : int
+            Player number.
+        moves : list of triples or k x 4 array of ints
+            Moves in either format accepted by game17.update_board.
+
+        Returns
+        -------
+        bool
+            Whether the moves were valid. Invalid moves leave the board
+            unchanged, but must still be popped.
+
+        """
+        if not isinstance(moves, np.ndarray):
+            moves = moves_to_array(moves)
+            # like update_board, let tuple moves count back from the end
+            squares = moves[:, :2]
+            squares[squares < 0] += self.board_size
+        if moves.size == 0:
+            self._undo.append(None)
+            return True
+        if not np.issubdtype(moves.dtype, np.integer):
+            raise ValueError('array moves must contain integers')
+        # narrow moves would overflow when working out flat indices
+        moves = moves.astype(np.intp, copy=False).reshape((-1, 4))
+        owners = self.owners.reshape(-1)
+        numbers = self.numbers.reshape(-1)
+        i, j, direction, number = moves.T
+        board_size = self.board_size
+        if ((i < 0) | (i >= board_size) | (j < 0) | (j >= board_size) |
+                (direction < 0) | (direction > 3)).any():
+            self._undo.append(None)
+            return False
+        from_square = i * board_size + j
+        if (owners[from_square] != owner).any():
+            self._undo.append(None)
+            return False
+        to_square = self._table[from_square, direction]
+        touched = np.unique(np.concatenate((from_square, to_square)))
+        outgoing = np.zeros(len(touched), dtype=np.int64)
+        incoming = np.zeros(len(touched), dtype=np.int64)
+        np.add.at(outgoing, np.searchsorted(touched, from_square), number)
+        np.add.at(incoming, np.searchsorted(touched, to_square), number)
+        old_owners = owners[touched]
+        old_numbers = numbers[touched]
+        # like update_board, check the totals, so a negative move is fine as
+        # long as it doesn't leave a negative total on any square
+        if (outgoing > old_numbers).any() or (outgoing < 0).any() or \
+                (incoming < 0).any():
+            self._undo.append(None)
+            return False
+        staying = old_numbers - outgoing
+        taken = incoming > staying
+        tied = (incoming > 0) & (incoming == staying)
+        if self.ties == 'attacker':
+            taken |= tied
+        elif self.ties == 'random':
+            taken[tied] = self.rng.random(tied.sum()) < 0.5
+        self._undo.append((touched, old_owners, old_numbers))
+        numbers[touched] = staying + incoming
+        owners[touched[taken]] = owner
+        return True
+
+    def pop(self):
+        'Take back the most recent push'
+        frame = self._undo.pop()
+        if frame is not None:
+            touched, old_owners, old_numbers = frame
+            self.owners.reshape(-1)[touched] = old_owners
+            self.numbers.reshape(-1)[touched] = old_numbers
+
+    def squares(self, owner):
+        'Number of squares owned by owner'
+        return int((self.owners == owner).sum())
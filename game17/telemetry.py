@@ -0,0 +1,111 @@
+"""
+Progress reporting for long runs of games.
+
+The runners report each finished game to a Progress object, which works out
+games and turns per second and the time remaining. It passes these to a
+callback after every game and, no more often than every interval seconds,
+writes them to a JSON metrics file that can be watched from elsewhere.
+"""
+
+import json
+import os
+import sys
+import time
+
+
+class Progress(object):
+    """
+    Track progress through a known number of games.
+
+    Parameters
+    ----------
+    total_games : int
+        Number of games that will be played.
+    callback : function, optional
+        Called with the snapshot dict after every game.
+    metrics_file : str or Path, optional
+        JSON file to keep up to date with the latest snapshot.
+    interval : float, optional
+        Minimum seconds between writes of metrics_file. The default is 10.
+    label : str, optional
+        Name of the competition, included in snapshots.
+
+    """
+
+    def __init__(self, total_games, callback=None, metrics_file=None,
+                 interval=10., label=''):
+        self.total_games = total_games
+        self.callback = callback
+        self.metrics_file = metrics_file
+        self.interval = interval
+        self.label = label
+        self.games = 0
+        self.turns = 0
+        self.banned = set()
+        self.failed = set()
+        self.start = time.perf_counter()
+        self._last_write = None
+
+    def snapshot(self):
+        'Dict of the current progress'
+        elapsed = time.perf_counter() - self.start
+        games_per_second = self.games / elapsed if elapsed > 0 else 0.
+        remaining = self.total_games - self.games
+        return {'label': self.label,
+                'games completed': self.games,
+                'total games': self.total_games,
+                'turns completed': self.turns,
+                'elapsed': elapsed,
+                'games/s': games_per_second,
+                'turns/s': self.turns / elapsed if elapsed > 0 else 0.,
+                'eta': (remaining / games_per_second
+                        if games_per_second > 0 else None),
+                'banned': sorted(self.banned),
+                'failed': sorted(self.failed)}
+
+    def game_done(self, turns, banned=(), games=1, failed=()):
+        """
+        Record finished games of turns turns, and the players banned (for
+        being too slow) and those whose games failed so far.
+        """
+        self.games += games
+        self.turns += turns
+        self.banned.update(banned)
+        self.failed.update(failed)
+        if self.callback is None and self.metrics_file is None:
+            return
+        snapshot = self.snapshot()
+        if self.callback is not None:
+            self.callback(snapshot)
+        if self.metrics_file is not None and (
+                self._last_write is None or self.games == self.total_games
+                or snapshot['elapsed'] - self._last_write >= self.interval):
+            self.write(snapshot)
+
+    def write(self, snapshot=None):
+        'Write the metrics file now'
+        if snapshot is None:
+            snapshot = self.snapshot()
+        self._last_write = snapshot['elapsed']
+        partial = f'{self.metrics_file}.partial'
+        with open(partial, 'w') as fh:
+            json.dump(snapshot, fh, default=int)
+        os.replace(partial, self.metrics_file)
+
+
+def print_progress(snapshot, file=None):
+    'Callback that prints a one line summary of a snapshot to stderr'
+    file = sys.stderr if file is None else file
+    eta = snapshot['eta']
+    if eta is None:
+        eta = '?'
+    else:
+        minutes, seconds = divmod(int(eta), 60)
+        eta = f'{minutes // 60}:{minutes % 60:02d}:{seconds:02d}'
+    banned = ', '.join(map(str, snapshot['banned'])) or 'none'
+    failed = ', '.join(map(str, snapshot['failed']))
+    print(f"{snapshot['label']}: {snapshot['games completed']}/"
+          f"{snapshot['total games']} games, {snapshot['games/s']:.2f} "
+          f"games/s, {snapshot['turns/s']:.0f} turns/s, ETA {eta}, "
+          f"banned: {banned}" + (f", failed: {failed}" if failed else ''),
+          file=file)
@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from game17 import game_runners
+from game17.analysis import analyse, iter_records, territory
+
+
+def test_territory():
+    scores, times, record = game_runners.game17({}, board_size=5, seed=0)
+    table = territory(record, 'test')
+    last = table[table['round'] == table['round'].max()]
+    assert dict(zip(last['player'], last['squares'])) == scores, \
+        "final territory does not match the scores"
+    assert (table.groupby('round')['pieces'].sum() == 100).all(), \
+        "pieces not conserved"
+    assert (table.groupby('round')['squares'].sum() == 25).all(), \
+        "squares not conserved"
+
+
+def test_analyse(tmp_path):
+    for i in range(3):
+        scores, times, record = game_runners.game17(
+            {}, board_size=4, num_rounds=3, seed=i)
+        with open(tmp_path / f'battle-royale-{i}.json', 'w') as fh:
+            json.dump(record, fh, cls=game_runners.NumPyEncoder)
+    names = [game for game, record in iter_records([tmp_path])]
+    assert names == [f'battle-royale-{i}' for i in range(3)], "bad names"
+    for processes in 1, 2:
+        output = tmp_path / f'territory-{processes}.tsv'
+        assert analyse([tmp_path], output, processes) == 3, "bad count"
+        table = pd.read_csv(output, sep='\t')
+        assert set(table['game']) == set(names), "games missing"
+        assert (table.groupby(['game', 'round'])['squares'].sum() ==
+                16).all(), "squares not conserved"
+    assert np.array_equal(
+        pd.read_csv(tmp_path / 'territory-1.tsv', sep='\t').values,
+        pd.read_csv(tmp_path / 'territory-2.tsv', sep='\t').values), \
+        "parallel analysis differs"
@@ -0,0 +1,60 @@
+import numpy as np
+
+from game17 import game_runners, zombie
+from game17.analysis import iter_records
+from game17.archive import ArchiveReader, ArchiveWriter, is_archive
+from game17.basic_mover import get_mover_factory
+
+
+def test_archive(tmp_path):
+    path = tmp_path / 'games.g17'
+    records = {}
+    with ArchiveWriter(path) as games:
+        for i in range(3):
+            scores, times, records[f'game-{i}'] = game_runners.game17(
+                {}, board_size=3, num_rounds=2, seed=i)
+            games.write(f'game-{i}', records[f'game-{i}'])
+    assert is_archive(path), "archive not recognised"
+    with ArchiveWriter(path, 'a') as games:
+        games.write('extra', {'owners': [[0]], 'numbers': [[4]],
+                              'diffs': []})
+    with ArchiveReader(path) as games:
+        assert games.keys() == ['game-0', 'game-1', 'game-2', 'extra'], \
+            "bad game ids"
+        game = games['game-1']
+        assert np.array_equal(game['owners'], records['game-1']['owners']), \
+            "bad record"
+        assert len(game['diffs']) == len(records['game-1']['diffs']), \
+            "bad record"
+
+
+def test_unclosed_archive(tmp_path):
+    path = tmp_path / 'games.g17'
+    games = ArchiveWriter(path)
+    games.write('one', {'diffs': [1]})
+    games.write('two', {'diffs': [2]})
+    games._fh.write(b'\x05\x00')  # a game cut short
+    games._fh.flush()
+    with ArchiveReader(path) as recovered:
+        assert recovered.keys() == ['one', 'two'], "games not recovered"
+        assert recovered['two'] == {'diffs': [2]}, "bad recovered game"
+    with ArchiveWriter(path, 'a') as games:
+        games.write('three', {'diffs': [3]})
+    with ArchiveReader(path) as recovered:
+        assert recovered.keys() == ['one', 'two', 'three'], "bad append"
+
+
+def test_runners_archive(tmp_path):
+    movers = {1: get_mover_factory(zombie.make_moves),
+              2: get_mover_factory(zombie.make_moves)}
+    with ArchiveWriter(tmp_path / 'tournament.g17') as games:
+        game_runners.battle_royale(movers, tmp_path, num_games=2,
+                                   board_size=3, num_rounds=3,
+                                   time_threshold=-1, archive=games)
+        game_runners.round_robin(movers, tmp_path, board_size=3,
+                                 num_rounds=3, time_threshold=-1,
+                                 archive=games)
+    assert not list(tmp_path.glob('*.json')), "records not archived"
+    names = [game for game, record in iter_records([tmp_path])]
+    assert names == ['battle-royale-0', 'battle-royale-1', '1 vs 2'], \
+        "bad archived games"
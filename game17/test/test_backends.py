@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from game17 import game_runners, backends
+from game17 import game17 as g17
+
+
+def test_get_backend():
+    assert backends.get_backend('numpy').name == 'numpy'
+    assert backends.get_backend('auto').name in ('numpy', 'numba')
+    backend = backends.NumpyBackend()
+    assert backends.get_backend(backend) is backend
+    with pytest.raises(ValueError):
+        backends.get_backend('abacus')
+
+
+def test_kernels():
+    # the uncompiled kernels should move pieces as update_board does
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        owners = rng.integers(0, 3, (5, 5))
+        numbers = rng.integers(0, 4, (5, 5))
+        squares = np.flatnonzero((owners == 1) & (numbers > 0))
+        moves = np.array([(s // 5, s % 5, rng.integers(4), numbers.flat[s])
+                          for s in squares]).reshape((-1, 4))
+        outgoing = np.zeros(25, dtype=np.int64)
+        incoming = np.zeros(25, dtype=np.int64)
+        status = backends._tally_kernel(
+            1, moves, owners.ravel(), 5, g17.neighbour_table(5),
+            outgoing, incoming)
+        assert status == backends._OK, "bad tally"
+        kernel_owners, kernel_numbers = owners.copy(), numbers.copy()
+        status, ties = backends._resolve_kernel(
+            1, outgoing, incoming, kernel_owners.ravel(),
+            kernel_numbers.ravel())
+        kernel_owners.ravel()[ties] = 1
+        g17.update_board(1, moves, owners, numbers,
+                         rng=np.random.default_rng([1, 1]))
+        assert (kernel_numbers == numbers).all(), "bad numbers"
+        assert (kernel_owners[~np.isin(np.arange(25), ties).reshape(5, 5)]
+                == owners[~np.isin(np.arange(25), ties).reshape(5, 5)]
+                ).all(), "bad owners"
+
+
+def test_numba_backend():
+    pytest.importorskip('numba')
+    numpy_scores, _, numpy_record = game_runners.game17(
+        {}, board_size=6, seed=1, backend='numpy')
+    numba_scores, _, numba_record = game_runners.game17(
+        {}, board_size=6, seed=1, backend='numba')
+    assert numpy_scores == numba_scores, "backends played different games"
+    for one, two in zip(numpy_record['diffs'], numba_record['diffs']):
+        assert (one['owners'] == two['owners']).all(), "different owners"
+        assert (one['numbers'] == two['numbers']).all(), "different numbers"
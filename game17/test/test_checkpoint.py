@@ -0,0 +1,81 @@
+import pytest
+
+from game17 import game_runners
+from game17.basic_mover import get_mover_factory
+from game17.checkpoint import load_checkpoint
+from game17.game17 import create_board
+from game17.latency import Latencies
+
+
+def stay(owner, rounds_left, owners, numbers):
+    return []
+
+
+def interrupt(owner, rounds_left, owners, numbers):
+    raise KeyboardInterrupt
+
+
+def test_battle_royale_resume(tmp_path):
+    movers = {p: get_mover_factory(stay) for p in range(1, 4)}
+    kwargs = {'num_games': 6, 'board_size': 4, 'num_rounds': 3,
+              'time_threshold': -1, 'seed': 0}
+    ranks = game_runners.battle_royale(movers, tmp_path / 'all', **kwargs)
+    expected = load_checkpoint(tmp_path / 'all', 'battle-royale', movers)
+
+    out = tmp_path / 'resumed'
+    game_runners.battle_royale(movers, out, **dict(kwargs, num_games=2))
+    interrupted = {**movers, 3: get_mover_factory(interrupt)}
+    with pytest.raises(KeyboardInterrupt):
+        game_runners.battle_royale(interrupted, out, resume=True, **kwargs)
+    snapshots = []
+    resumed_ranks = game_runners.battle_royale(
+        movers, out, resume=True, progress=snapshots.append, **kwargs)
+    assert len(snapshots) == 4, "recorded games played again"
+    assert resumed_ranks == ranks, "resumed ranks differ"
+    state = load_checkpoint(out, 'battle-royale', movers)
+    assert state['victories'] == expected['victories'], \
+        "victories not restored"
+    assert state['games'] == 6
+    assert len(list(out.glob('battle-royale-*.json'))) == 6, "missing games"
+
+    with pytest.raises(ValueError):
+        game_runners.battle_royale({1: movers[1]}, out, resume=True, **kwargs)
+
+
+class Play(object):
+    'Plays fake games, in which player 1 is slow and lower players win'
+
+    def __init__(self, stop=None):
+        self.stop = stop
+        self.calls = 0
+
+    def __call__(self, pair, latencies, seed):
+        self.calls += 1
+        if self.calls == self.stop:
+            raise KeyboardInterrupt
+        for player in pair:
+            latencies.setdefault(player, Latencies()).record(
+                player / 10, player / 100)
+        owners, numbers = create_board(3)
+        return ({min(pair): 2, max(pair): 1},
+                {player: 0.01 * player for player in pair},
+                {'owners': owners, 'numbers': numbers, 'diffs': []})
+
+
+def test_round_robin_resume(tmp_path):
+    movers = dict.fromkeys(range(1, 6))
+    kwargs = {'time_threshold': 0.035, 'group': 2}
+    ranks = game_runners.round_robin(
+        movers, tmp_path / 'all', play=Play(), **kwargs)
+
+    out = tmp_path / 'resumed'
+    with pytest.raises(KeyboardInterrupt):
+        game_runners.round_robin(movers, out, play=Play(stop=5), **kwargs)
+    play = Play()
+    resumed_ranks = game_runners.round_robin(
+        movers, out, play=play, resume=True, **kwargs)
+    assert play.calls == 1, "recorded games played again"
+    assert resumed_ranks == ranks, "resumed ranks differ"
+    for name in 'round-robin-2.txt', 'round-robin-summary-2.txt':
+        assert (out / name).read_text() == \
+            (tmp_path / 'all' / name).read_text(), f"{name} differs"
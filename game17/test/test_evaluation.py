@@ -0,0 +1,73 @@
+import numpy as np
+
+from game17 import evaluation, game_runners, zombie
+from game17.basic_mover import get_mover_factory
+from game17.evaluation import evaluate, num_looks, paired_interval
+
+
+def do_nothing(owner, rounds_left, owners, numbers):
+    return []
+
+
+def test_seeded_games_repeat():
+    players = {0: get_mover_factory(do_nothing)}
+    np.random.seed(1)
+    _, _, first = game_runners.game17(players, board_size=5, seed=(3, 0))
+    np.random.seed(2)
+    _, _, second = game_runners.game17(players, board_size=5, seed=(3, 0))
+    assert (first['owners'] == second['owners']).all(), "boards differ"
+    assert len(first['diffs']) == len(second['diffs']), "games differ"
+    for one, two in zip(first['diffs'], second['diffs']):
+        assert one['owner'] == two['owner'], "turn orders differ"
+        assert (one['owners'] == two['owners']).all(), "moves differ"
+        assert (one['numbers'] == two['numbers']).all(), "moves differ"
+
+
+def test_paired_interval():
+    mean, lower, upper = paired_interval([1, 2, 3, 4, 5])
+    assert mean == 3, "bad mean"
+    assert lower < 3 < upper, "bad interval"
+    assert np.isclose(3 - lower, upper - 3), "interval not symmetric"
+
+
+def test_evaluate():
+    candidates = {'zombie': get_mover_factory(zombie.make_moves),
+                  'statue': get_mover_factory(do_nothing)}
+    summary, comparisons, scores = evaluate(
+        candidates, num_games=4, board_size=4, num_rounds=5, min_games=2,
+        batch_size=2)
+    assert list(summary.index) == ['zombie', 'statue'], "bad summary"
+    assert list(comparisons.index) == ['statue - zombie'], \
+        "bad comparisons"
+    assert len(scores) in (2, 4), "bad number of games"
+    assert (summary['games'] == len(scores)).all(), "bad number of games"
+    differences = scores['statue'] - scores['zombie']
+    _, lower, upper = paired_interval(differences, 1 - 0.05 / 2)
+    assert np.isclose(comparisons['lower'].iloc[0], lower) and \
+        np.isclose(comparisons['upper'].iloc[0], upper), \
+        "interval not widened for repeated looks"
+
+
+def test_tuple_seed(monkeypatch):
+    seeds = []
+    game17 = game_runners.game17
+
+    def recording_game17(*args, seed=None, **kwargs):
+        seeds.append(seed)
+        return game17(*args, seed=seed, **kwargs)
+    monkeypatch.setattr(evaluation, 'game17', recording_game17)
+    monkeypatch.setattr(game_runners, 'game17', recording_game17)
+    candidates = {'statue': get_mover_factory(do_nothing)}
+    evaluate(candidates, num_games=2, board_size=4, num_rounds=5,
+             seed=(3, 4), min_games=2)
+    game_runners.vs_zombies(candidates, num_games=2, board_size=4,
+                            num_rounds=5, seed=(3, 4))
+    assert seeds == [(3, 4, 0), (3, 4, 1)] * 2, "tuple seeds nested"
+
+
+def test_num_looks():
+    assert num_looks(100) == 10, "bad number of looks"
+    assert num_looks(95) == 10, "last game not counted as a look"
+    assert num_looks(100, min_games=30, batch_size=20) == 4, \
+        "bad number of looks"
+    assert num_looks(5) == 1, "too few looks"
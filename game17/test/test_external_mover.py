@@ -0,0 +1,147 @@
+import io
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from game17 import game_runners, zombie
+from game17.basic_mover import get_mover_factory
+from game17.external_mover import serve, get_external_mover_factory
+
+repo = Path(__file__).resolve().parents[2]
+
+
+def test_serve():
+    owners = np.arange(9).reshape((3, 3))
+    numbers = 4*np.ones((3, 3), dtype=int)
+    messages = io.StringIO(
+        'game 4 3 10\n'
+        '0 1 2 3 4 5 6 7 8\n'
+        '0 1 2 3 4 5 6 7 8\n'
+        '4 4 4 4 4 4 4 4 4\n'
+        'turn 4 9\n'
+        '0 1 2 3 4 5 6 7 8\n'
+        '4 4 4 4 4 4 4 4 4\n'
+        'quit\n')
+    replies = io.StringIO()
+    serve(get_mover_factory(zombie.make_moves), messages, replies)
+    ready, ready_for_game, moves = replies.getvalue().splitlines()
+    assert ready == ready_for_game == 'ready', "not ready"
+    moves = np.array(moves.split(), dtype=int).reshape((-1, 4))
+    assert (moves[:, :2] == (1, 1)).all(), "moved unowned pieces"
+    assert moves[:, 3].sum() == 4, "wrong number of pieces moved"
+
+
+def test_external_mover(monkeypatch):
+    monkeypatch.setenv('PYTHONPATH', str(repo))
+    get_mover = get_external_mover_factory(
+        [sys.executable, '-m', 'game17.external_player',
+         str(repo / 'demo' / 'stub.py')])
+    try:
+        for _ in range(2):
+            score, times, record = game_runners.game17(
+                {1: get_mover}, board_size=4, num_rounds=5)
+            assert sum(score.values()) == 16, "bad values"
+            if _ == 0:
+                pid = get_mover.bot.process.pid
+        assert get_mover.bot.process.pid == pid, "bot process not reused"
+        assert len(get_mover.bot.latencies) > 0, "latencies not recorded"
+    finally:
+        get_mover.bot.close()
+    assert get_mover.bot.process.poll() is not None, "bot did not quit"
+
+
+def test_noisy_external_mover(monkeypatch, tmp_path):
+    monkeypatch.setenv('PYTHONPATH', str(repo))
+    player = tmp_path / 'noisy.py'
+    player.write_text(
+        'from game17.zombie import make_moves as make_moves_zombie\n'
+        'print("importing")\n'
+        '\n'
+        'def get_mover(owner, owners, numbers, turn_order, num_rounds):\n'
+        '    print("new game")\n'
+        '\n'
+        '    def mover(owners, numbers):\n'
+        '        print("moving")\n'
+        '        return make_moves_zombie(owner, 1, owners, numbers)\n'
+        '    return mover\n')
+    get_mover = get_external_mover_factory(
+        [sys.executable, '-m', 'game17.external_player', str(player)])
+    owners = np.array([[1, 1], [0, 0]])
+    numbers = 4*np.ones((2, 2), dtype=int)
+    try:
+        mover = get_mover(owner=1, owners=owners, numbers=numbers,
+                          turn_order=[0, 1], num_rounds=5)
+        for _ in range(2):
+            moves = mover(owners, numbers)
+            assert len(moves), "no moves from the bot"
+            assert (owners[moves[:, 0], moves[:, 1]] == 1).all(), \
+                "moved unowned pieces"
+    finally:
+        get_mover.bot.close()
+
+
+def test_slow_external_mover(monkeypatch, tmp_path):
+    monkeypatch.setenv('PYTHONPATH', str(repo))
+    player = tmp_path / 'slow.py'
+    player.write_text(
+        'import time\n'
+        '\n'
+        'def make_moves(owner, rounds_left, owners, numbers):\n'
+        '    time.sleep(0.1)\n'
+        '    return []\n')
+    command = [sys.executable, '-m', 'game17.external_player', str(player)]
+    get_mover = get_external_mover_factory(command)
+    try:
+        score, times, record = game_runners.game17(
+            {1: get_mover}, board_size=4, num_rounds=2)
+        assert times[1] >= 0.1, "bot not charged for its time"
+    finally:
+        get_mover.bot.close()
+    get_mover = get_external_mover_factory(command, timeout=0.01)
+    owners = np.array([[1, 1], [0, 0]])
+    numbers = 4*np.ones((2, 2), dtype=int)
+    try:
+        mover = get_mover(owner=1, owners=owners, numbers=numbers,
+                          turn_order=[0, 1], num_rounds=5)
+        with pytest.raises(RuntimeError):
+            mover(owners, numbers)
+        assert get_mover.bot.process.poll() is not None, "slow bot not killed"
+        get_mover(owner=1, owners=owners, numbers=numbers,
+                  turn_order=[0, 1], num_rounds=5)
+        assert get_mover.bot.process.poll() is None, "slow bot not restarted"
+    finally:
+        get_mover.bot.close()
+
+
+def test_external_start_up_not_timed(monkeypatch, tmp_path):
+    monkeypatch.setenv('PYTHONPATH', str(repo))
+    player = tmp_path / 'sleepy.py'
+    player.write_text(
+        'import time\n'
+        'time.sleep(0.5)\n'
+        '\n'
+        'def get_mover(owner, owners, numbers, turn_order, num_rounds):\n'
+        '    time.sleep(0.5)\n'
+        '    return lambda owners, numbers: []\n')
+    get_mover = get_external_mover_factory(
+        [sys.executable, '-m', 'game17.external_player', str(player)])
+    try:
+        score, times, record = game_runners.game17(
+            {1: get_mover}, board_size=4, num_rounds=2)
+        assert max(get_mover.bot.latencies) < 0.5, \
+            "start up or set up timed as a turn"
+    finally:
+        get_mover.bot.close()
+
+
+def test_external_player_entry_point(monkeypatch):
+    monkeypatch.setenv('PYTHONPATH', str(repo))
+    run = subprocess.run(
+        [sys.executable, '-m', 'game17.external_player'],
+        capture_output=True, text=True)
+    assert run.returncode == 1, "bad exit status"
+    assert 'usage' in run.stderr, "no usage message"
+    assert 'Warning' not in run.stderr, "warning on start"
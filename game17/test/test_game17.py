@@ -11,8 +11,10 @@ from game17 import zombie
 from game17 import game_runners
 from game17 import game17 as g17
 from game17.basic_mover import get_mover_factory
+from game17.game_view import GameView
 
 import numpy as np
+import pytest
 from collections import Counter
 
 test_owners = [[2, 7, 8, 4, 0, 0, 7],
@@ -63,6 +65,11 @@ def test_create_board():
     assert numbers.shape == (7, 7), "board is the wrong shape"
     assert (np.unique(owners) == np.arange(49)).all(), "bad owners"
     assert (numbers == 4).all(), "bad number of pieces"
+    assert owners.dtype == np.int16, "owners not compact"
+    assert numbers.dtype == np.int32, "numbers not compact"
+    owners, numbers = g17.create_board(182)
+    assert owners.max() == 182**2 - 1, "owners overflowed"
+    assert owners.dtype == np.int32, "owners too narrow"
 
 
 def test_destination():
@@ -88,6 +95,20 @@ def test_destination():
         assert (test_out == (out_i, out_j)).all(), "bad destination"
 
 
+def test_neighbour_table():
+    n = 5
+    table = g17.neighbour_table(n)
+    assert table.shape == (n**2, 4), "neighbour table is the wrong shape"
+    assert not table.flags.writeable, "neighbour table is writeable"
+    assert g17.neighbour_table(n) is table, "neighbour table not cached"
+    for i in range(n):
+        for j in range(n):
+            for k, d in enumerate('nsew'):
+                dest_i, dest_j = g17.destination(np.array((i, j)), d, n)
+                assert table[i*n + j, k] == dest_i*n + dest_j, \
+                    "bad neighbour"
+
+
 def test_update_board():
     owners = np.array(test_owners)
     numbers = np.array(test_numbers)
@@ -127,13 +148,170 @@ def test_update_board():
     assert (numbers_diff == 0).all(), "numbers updated incorrectly"
 
 
+def test_update_board_array():
+    moves = [(np.array([0, 0]), 's', 2),
+             (np.array([3, 5]), 'n', 3),
+             (np.array([3, 5]), 'e', 3),
+             (np.array([4, 6]), 'w', 3),
+             (np.array([4, 6]), 'e', 2),
+             (np.array([5, 3]), 'w', 2),
+             (np.array([6, 4]), 's', 1)]
+    array_moves = g17.moves_to_array(moves)
+    assert array_moves.shape == (len(moves), 4), "bad array moves shape"
+    owners = np.array(test_owners)
+    numbers = np.array(test_numbers)
+    np.random.seed(0)
+    g17.update_board(2, moves, owners, numbers)
+    array_owners = np.array(test_owners)
+    array_numbers = np.array(test_numbers)
+    np.random.seed(0)
+    g17.update_board(2, array_moves, array_owners, array_numbers)
+    assert (owners == array_owners).all(), "array moves changed owners"
+    assert (numbers == array_numbers).all(), "array moves changed numbers"
+
+    bad_moves = [[[0, 0, 1, -1]],  # negative
+                 [[0, 0, 1, 2**40], [0, 0, 2, -2**40]],  # overflow
+                 [[7, 0, 1, 1]],  # out of bounds
+                 [[0, 0, 4, 1]],  # bad direction
+                 [[0, 1, 1, 1]],  # unowned
+                 [[0, 0, 1, 2], [0, 0, 2, 2]]]  # over-committed
+    for bad in bad_moves:
+        owners, numbers = test_owners.astype(np.int16), \
+            test_numbers.astype(np.int32)
+        g17.update_board(2, np.array(bad), owners, numbers)
+        assert owners.dtype == np.int16, "owners dtype changed"
+        assert numbers.dtype == np.int32, "numbers dtype changed"
+        assert (owners == test_owners).all(), "bad move changed owners"
+        assert (numbers == test_numbers).all(), "bad move changed numbers"
+
+    for square in (7, 0), (-8, 0), (0, 7):
+        owners, numbers = np.array(test_owners), np.array(test_numbers)
+        g17.update_board(2, [(np.array(square), 's', 1)], owners, numbers)
+        assert (owners == test_owners).all(), "bad move changed owners"
+        assert (numbers == test_numbers).all(), "bad move changed numbers"
+    for direction in '', 'ns', 'ew', 'N':
+        owners, numbers = np.array(test_owners), np.array(test_numbers)
+        with pytest.raises(KeyError):
+            g17.update_board(2, [(np.array([6, 4]), direction, 1)], owners,
+                             numbers)
+        with pytest.raises(KeyError):
+            g17.moves_to_array([(np.array([6, 4]), direction, 1)])
+        assert (numbers == test_numbers).all(), "bad move changed numbers"
+    boards = []
+    for square in (6, 4), (-1, -3):
+        owners, numbers = np.array(test_owners), np.array(test_numbers)
+        g17.update_board(2, [(np.array(square), 's', 1)], owners, numbers)
+        boards.append((owners, numbers))
+    assert (boards[0][0] == boards[1][0]).all() and \
+        (boards[0][1] == boards[1][1]).all(), \
+        "negative coordinates don't count back from the end"
+    assert (boards[0][1] != test_numbers).any(), "move not made"
+
+
+def test_update_board_narrow_moves():
+    owners = np.zeros((14, 14), dtype=int)
+    owners[13, 13] = 1
+    numbers = np.ones((14, 14), dtype=int)
+    for dtype in np.int8, np.int16:
+        moves = np.array([[13, 13, 1, 1]], dtype=dtype)
+        for tally in moves, [(moves[0, :2], 's', moves[0, 3])]:
+            after_owners, after_numbers = owners.copy(), numbers.copy()
+            g17.update_board(1, tally, after_owners, after_numbers)
+            assert after_numbers[13, 13] == 0, \
+                f"{dtype.__name__} moves moved the wrong pieces"
+            assert after_numbers[0, 13] == 2, \
+                f"{dtype.__name__} moves went to the wrong square"
+
+
+def test_game_view():
+    owners = np.array(test_owners)
+    numbers = np.array(test_numbers)
+    view = GameView(owners, numbers)
+    for owner in np.unique(test_owners):
+        assert (view.owned_pieces(owner) ==
+                g17.find_owned_pieces(owner, owners, numbers)).all(), \
+            "bad owned pieces"
+    assert view.owned_pieces(2) is view.owned_pieces(2), "not memoized"
+    assert not view.owned_pieces(2).flags.writeable, "cache is writeable"
+    neighbours = numbers.ravel()[g17.neighbour_table(7)]
+    assert (view.neighbour_numbers() == neighbours).all(), \
+        "bad neighbour numbers"
+    assert view.squares() == Counter(test_owners.ravel().tolist()), \
+        "bad squares"
+    pieces = Counter()
+    for o, n in zip(test_owners.ravel(), test_numbers.ravel()):
+        if n > 0:
+            pieces[int(o)] += int(n)
+    assert view.pieces() == pieces, "bad pieces"
+    assert view.squares() is view.squares(), "squares copied"
+    with pytest.raises(TypeError):
+        view.squares()[2] = 0
+
+    g17.update_board(2, [(np.array([0, 0]), 's', 3)], owners, numbers)
+    view.update(owners, numbers)
+    assert len(view.owned_pieces(2)) == \
+        len(g17.find_owned_pieces(2, owners, numbers)), "view not updated"
+
+
 def test_game17():
     n = 4
     score, times, record = game_runners.game17({}, board_size=n)
     assert set(score.keys()) < set(range(n**2)), "bad players"
     assert sum(score.values()) == n**2, "bad values"
+    owners = np.array(record['owners'])
+    numbers = np.array(record['numbers'])
+    for diff in record['diffs']:
+        assert diff['owners'].dtype == np.int16, "owners diff not compact"
+        assert diff['numbers'].dtype == np.int32, "numbers diff not compact"
+        g17.apply_diff(owners, diff['owners'])
+        g17.apply_diff(numbers, diff['numbers'])
+    assert sum(numbers.ravel()) == 4*n**2, "pieces not conserved"
+    assert {o: (owners == o).sum() for o in np.unique(owners)} == score, \
+        "record does not replay to the final board"
     two_zombies = {1: get_mover_factory(zombie.make_moves),
                    2: get_mover_factory(zombie.make_moves)}
     score, times, record = game_runners.game17(two_zombies, board_size=n)
     assert set(score.keys()) < set(range(n**2)), "bad players"
     assert sum(score.values()) == n**2, "bad values"
+
+    def make_moves_array(owner, rounds_left, owners, numbers):
+        return g17.moves_to_array(
+            zombie.make_moves(owner, rounds_left, owners, numbers))
+    array_zombies = {1: get_mover_factory(make_moves_array)}
+    score, times, record = game_runners.game17(array_zombies, board_size=n)
+    assert sum(score.values()) == n**2, "bad values"
+
+    views = []
+
+    def make_moves_view(owner, rounds_left, owners, numbers, view=None):
+        views.append((view, (view.owners == owners).all()))
+        return zombie.make_moves(owner, rounds_left, owners, numbers, view)
+    view_zombies = {1: get_mover_factory(make_moves_view)}
+    score, times, record = game_runners.game17(view_zombies, board_size=n)
+    assert sum(score.values()) == n**2, "bad values"
+    assert isinstance(views[0][0], GameView), "mover not given a view"
+    assert all(current for _, current in views), "view out of date"
+
+    def make_moves_cheat(owner, rounds_left, owners, numbers, view=None):
+        for board in view.owners, view.numbers:
+            board.setflags(write=True)
+        view.owners[:] = owner
+        view.numbers[:] = 1
+        return []
+    cheats = {1: get_mover_factory(make_moves_cheat)}
+    score, times, record = game_runners.game17(cheats, board_size=n)
+    assert score.get(1, 0) < n**2, "mover changed the real board"
+
+    shared = []
+
+    def make_moves_scribble(owner, rounds_left, owners, numbers, view=None):
+        squares = dict(view.squares())
+        owners[:] = owner
+        shared.append((view.owners == owner).all() and
+                      squares != {owner: n**2})
+        return []
+    scribblers = {1: get_mover_factory(make_moves_scribble),
+                  2: get_mover_factory(make_moves_scribble)}
+    score, times, record = game_runners.game17(scribblers, board_size=n,
+                                               num_rounds=3)
+    assert shared and not any(shared), "view shares the mover's board"
@@ -0,0 +1,94 @@
+import time
+
+from game17 import game_runners
+from game17.game17 import create_board
+from game17.basic_mover import get_mover_factory
+from game17.latency import COLUMNS, LatencyHistogram, Latencies
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    assert histogram.summary()['p50'] != histogram.summary()['p50'], \
+        "empty histogram should give nan"
+    for _ in range(990):
+        histogram.record(0.001)
+    for _ in range(10):
+        histogram.record(2.)
+    assert histogram.count == 1000
+    assert 0.001 <= histogram.percentile(50) < 0.001 * 1.13, "bad p50"
+    assert 0.001 <= histogram.percentile(99) < 0.001 * 1.13, "bad p99"
+    assert histogram.percentile(99.5) == 2., "bad p99.5"
+    assert histogram.summary()['max'] == 2.
+    other = LatencyHistogram()
+    other.record(5.)
+    histogram.merge(other)
+    assert histogram.count == 1001 and histogram.max == 5., "bad merge"
+    histogram.record(0.)
+    histogram.record(1e6)
+    assert histogram.count == 1003, "out of range times not counted"
+
+
+def test_exceeds():
+    histogram = LatencyHistogram()
+    assert not histogram.exceeds(50, 0.), "empty histogram too slow"
+    for _ in range(99):
+        histogram.record(0.0104)
+    histogram.record(1.)
+    # 0.0104 and 0.0105 share a bin, whose top is more than 0.0105
+    assert histogram.percentile(50) > 0.0105, "test needs a shared bin"
+    assert not histogram.exceeds(50, 0.0105), "banned within a bin"
+    assert histogram.exceeds(50, 0.01), "not banned at a bin edge"
+    assert histogram.exceeds(99.5, 0.5), "not banned by the slowest time"
+    assert not histogram.exceeds(99.5, 1.), "banned at the slowest time"
+
+
+def test_latencies():
+    latencies = Latencies()
+    latencies.record(0.5, 0.25)
+    summary = latencies.summary()
+    assert list(summary) == COLUMNS
+    assert summary['wall max'] == 0.5 and summary['cpu max'] == 0.25
+
+
+def spiky(owner, rounds_left, owners, numbers):
+    if rounds_left == 0:
+        end = time.perf_counter() + 0.02
+        while time.perf_counter() < end:
+            pass
+    return []
+
+
+def test_game_latencies():
+    latencies = {}
+    game_runners.game17({1: get_mover_factory(spiky)}, board_size=4,
+                        num_rounds=1, seed=0, latencies=latencies)
+    assert latencies[1].cpu.count == 1, "calls not counted"
+    assert latencies[1].wall.max >= 0.02, "wall time not counted"
+
+
+def play_spiky(pair, latencies, seed):
+    'Player 1 takes 1 ms, except for one 1 s move in 20'
+    for player in pair:
+        latencies.setdefault(player, Latencies())
+        for k in range(20):
+            spike = player == 1 and k == 0
+            latencies[player].record(1. if spike else 1e-3,
+                                     1. if spike else 1e-3)
+    owners, numbers = create_board(3)
+    return ({player: 1 for player in pair}, {player: 1e-3 for player in pair},
+            {'owners': owners, 'numbers': numbers, 'diffs': []})
+
+
+def test_ban_percentile(tmp_path):
+    movers = {1: None, 2: None}
+    for ban_percentile, banned in (None, False), (50, False), (99, True):
+        out = tmp_path / str(ban_percentile)
+        ranks = game_runners.round_robin(
+            movers, out, time_threshold=0.01, play=play_spiky,
+            ban_percentile=ban_percentile)
+        assert (ranks[-1] == {1}) == banned, \
+            f"wrong ban for percentile {ban_percentile}"
+        with open(out / 'round-robin-summary.txt') as fh:
+            summary = fh.read()
+        assert 'cpu p99' in summary and 'wall max' in summary, \
+            "latencies missing from summary"
@@ -0,0 +1,50 @@
+import tracemalloc
+
+import numpy as np
+
+from game17 import T800
+from game17.basic_mover import get_mover_factory
+from game17.profiling import profile
+
+
+def hoard(owner, rounds_left, owners, numbers):
+    hoard.kept.append(np.zeros(1000))
+    return []
+
+
+hoard.kept = []
+
+
+def test_profile():
+    result = profile(get_mover_factory(T800.make_moves), num_games=2,
+                     board_size=6, num_rounds=5)
+    assert result.turns == len(result.turn_times) > 0, "no turns timed"
+    assert any('make_moves (T800.py' in f for f in result.functions.index), \
+        "bot functions not profiled"
+    assert not any('update_board' in f for f in result.functions.index), \
+        "engine profiled"
+    assert result.scaling.turns.sum() == result.turns, "turns not binned"
+    assert 'squares **' in result.report(5)
+
+
+def test_profile_allocation():
+    result = profile(get_mover_factory(hoard), num_games=1, board_size=4,
+                     num_rounds=3)
+    assert result.peak.min() >= 8000, "allocations not counted"
+    assert result.retained >= 8000 * len(result.peak), \
+        "retained memory not counted"
+
+
+def watch(owner, rounds_left, owners, numbers):
+    watch.tracing.append(tracemalloc.is_tracing())
+    return []
+
+
+watch.tracing = []
+
+
+def test_profile_passes():
+    result = profile(get_mover_factory(watch), num_games=1, board_size=4,
+                     num_rounds=3)
+    assert watch.tracing == [False] * (2 * result.turns) + \
+        [True] * result.turns, "tracemalloc on while timing"
@@ -0,0 +1,75 @@
+import numpy as np
+
+from game17 import zombie, T800
+from game17 import game17 as g17
+from game17.rollout import _zombie_turns, rollout, rollouts
+
+
+def test_rollout():
+    owners, numbers = g17.create_board(5, np.random.default_rng(0))
+    turn_order = list(range(25))
+    before_owners, before_numbers = owners.copy(), numbers.copy()
+    results = [rollout(3, zombie.make_moves, owners, numbers, turn_order, 5,
+                       position=7, opponents={4: T800.make_moves},
+                       rng=np.random.default_rng(1)) for _ in range(2)]
+    assert (owners == before_owners).all(), "rollout changed owners"
+    assert (numbers == before_numbers).all(), "rollout changed numbers"
+    (owners1, numbers1), (owners2, numbers2) = results
+    assert numbers1.sum() == numbers.sum(), "pieces not conserved"
+    assert (owners1 == owners2).all(), "seeded rollouts differ"
+    assert (numbers1 == numbers2).all(), "seeded rollouts differ"
+
+
+def test_rollouts():
+    owners = np.ones((4, 4), dtype=int)
+    owners[0, 0] = 2
+    numbers = 5*np.ones((4, 4), dtype=int)
+    numbers[0, 0] = 4
+
+    def stay(owner, rounds_left, owners, numbers):
+        return []
+    squares = rollouts(1, stay, owners, numbers, [2, 1], 50, 8,
+                       rng=np.random.default_rng(2))
+    assert squares.shape == (8,), "bad number of rollouts"
+    assert (squares == 15).all(), "zombie should lose its pieces"
+
+
+def test_rollouts_are_quiet(capsys):
+    owners = np.ones((3, 3), dtype=int)
+    numbers = np.ones((3, 3), dtype=int)
+
+    def cheat(owner, rounds_left, owners, numbers):
+        return [(np.array([0, 0]), 'n', 5)]
+    rollouts(1, cheat, owners, numbers, [1], 3, 2,
+             rng=np.random.default_rng(0))
+    assert capsys.readouterr().out == '', "skip messages printed"
+
+
+def test_zombie_turns():
+    rng = np.random.default_rng(3)
+    owners = np.stack([g17.create_board(5, rng)[0] for _ in range(3)])
+    numbers = rng.integers(0, 6, size=owners.shape)
+    before_owners, before_numbers = owners.copy(), numbers.copy()
+    playing = np.array([True, False, True])
+    _zombie_turns(owners[0, 0, 0], owners, numbers, playing,
+                  g17.neighbour_table(5), rng)
+    assert (numbers.sum(axis=(1, 2)) ==
+            before_numbers.sum(axis=(1, 2))).all(), "pieces not conserved"
+    assert (owners[1] == before_owners[1]).all() and \
+        (numbers[1] == before_numbers[1]).all(), "finished board changed"
+    assert (numbers[0] != before_numbers[0]).any(), "zombie didn't move"
+
+
+def test_rollouts_match_rollout():
+    owners, numbers = g17.create_board(3, np.random.default_rng(0))
+    turn_order = list(range(9))
+
+    def stay(owner, rounds_left, owners, numbers):
+        return []
+    batched = rollouts(3, stay, owners, numbers, turn_order, 4, 2000,
+                       rng=np.random.default_rng(1))
+    rng = np.random.default_rng(2)
+    single = [(rollout(3, stay, owners, numbers, turn_order, 4,
+                       rng=rng)[0] == 3).sum() for _ in range(2000)]
+    assert abs(batched.mean() - np.mean(single)) < 0.03, \
+        "batched rollouts play differently"
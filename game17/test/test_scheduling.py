@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+from game17 import zombie
+from game17.basic_mover import get_mover_factory
+from game17.latency import COLUMNS
+from game17.scheduling import all_vs_zombies, game_pool, run_off
+
+
+def test_run_off(tmp_path):
+    movers = {p: get_mover_factory(zombie.make_moves) for p in range(1, 7)}
+    ranks = [{1}, {2, 3, 4}, {5, 6}]
+    for processes in 1, 2:
+        out = tmp_path / str(processes)
+        fine_ranks = run_off(movers, ranks, out, board_size=3, num_rounds=2,
+                             time_threshold=-1, processes=processes)
+        assert fine_ranks[0] == {1}, "singleton group moved"
+        players = [p for rank in fine_ranks for p in sorted(rank)]
+        assert sorted(players[1:4]) == [2, 3, 4] and \
+            sorted(players[4:]) == [5, 6], "groups out of order"
+        for group in 1, 2:
+            assert (out / f'round-robin-{group}.txt').exists(), \
+                f"no results for group {group}"
+        assert len(list(out.glob('* vs *'))) == 4, "games missing"
+
+
+def stay(owner, rounds_left, owners, numbers):
+    return []
+
+
+def broken_get_mover(**kwargs):
+    raise RuntimeError('broken')
+
+
+def exiting_get_mover(**kwargs):
+    sys.exit('exiting')
+
+
+def dying_get_mover(**kwargs):
+    os._exit(1)
+
+
+def test_all_vs_zombies():
+    for processes, dying in (1, exiting_get_mover), (2, dying_get_mover):
+        movers = {1: get_mover_factory(stay), 2: broken_get_mover,
+                  3: get_mover_factory(stay), 4: dying}
+        output = io.StringIO()
+        snapshots = []
+        failures = all_vs_zombies(movers, output, num_games=3, board_size=4,
+                                  num_rounds=3, processes=processes,
+                                  progress=snapshots.append)
+        assert sorted(failures) == [2, 4], "failures not isolated"
+        lines = sorted(line.split('\t')
+                       for line in output.getvalue().splitlines())
+        assert [line[0] for line in lines] == ['1', '3'], "results missing"
+        assert lines[0][1] == lines[1][1], \
+            "players did not face the same boards"
+        assert len(lines[0]) == 3 + len(COLUMNS), "latencies missing"
+        assert snapshots[-1]['games completed'] == 12, \
+            "progress not reported"
+        assert snapshots[-1]['failed'] == [2, 4], "failures not reported"
+        assert snapshots[-1]['banned'] == [], "failures reported as bans"
+
+
+def first_draw(movers):
+    time.sleep(0.1)
+    return os.getpid(), np.random.random()
+
+
+def test_game_pool_reseeds():
+    with game_pool({}, 2) as pool:
+        futures = [pool.submit(first_draw) for _ in range(4)]
+        draws = {}
+        for future in futures:
+            pid, draw = future.result()
+            draws.setdefault(pid, draw)
+    assert len(set(draws.values())) == len(draws), \
+        "workers share a random state"
@@ -0,0 +1,102 @@
+import numpy as np
+
+from game17 import zombie
+from game17 import game17 as g17
+from game17.simulation import SimulationBoard
+
+
+class Coin(object):
+    'Always picks the same side'
+    def __init__(self, side):
+        self.side = side
+
+    def choice(self, pair):
+        return pair[self.side]
+
+
+def random_board(rng, board_size=6, num_owners=4):
+    owners = rng.integers(0, num_owners, (board_size, board_size))
+    numbers = rng.integers(0, 6, (board_size, board_size))
+    return owners, numbers
+
+
+def test_push_matches_update_board():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        owners, numbers = random_board(rng)
+        moves = zombie.make_moves(1, None, owners, numbers, rng=rng)
+        for ties in 'defender', 'attacker':
+            board = SimulationBoard(owners, numbers, ties=ties)
+            assert board.push(1, moves), "valid moves rejected"
+            after_owners, after_numbers = owners.copy(), numbers.copy()
+            # with the same coin for every tie, update_board agrees
+            g17.update_board(1, moves, after_owners, after_numbers,
+                             Coin(ties == 'attacker'))
+            assert (board.owners == after_owners).all(), "bad owners"
+            assert (board.numbers == after_numbers).all(), "bad numbers"
+
+
+def test_push_pop():
+    rng = np.random.default_rng(1)
+    owners, numbers = random_board(rng)
+    board = SimulationBoard(owners, numbers, rng=rng)
+    history = []
+    for turn in range(30):
+        owner = turn % 4
+        history.append((board.owners.copy(), board.numbers.copy()))
+        moves = zombie.make_moves(
+            owner, None, board.owners, board.numbers, rng=rng)
+        assert board.push(owner, g17.moves_to_array(moves)), "bad push"
+        assert board.numbers.sum() == numbers.sum(), "pieces not conserved"
+    assert board.depth == 30, "bad depth"
+    while history:
+        board.pop()
+        before_owners, before_numbers = history.pop()
+        assert (board.owners == before_owners).all(), "owners not restored"
+        assert (board.numbers == before_numbers).all(), \
+            "numbers not restored"
+    assert board.depth == 0, "bad depth"
+
+
+def test_invalid_push():
+    rng = np.random.default_rng(2)
+    owners, numbers = random_board(rng)
+    board = SimulationBoard(owners, numbers)
+    i, j = np.argwhere((owners == 1) & (numbers > 0))[0]
+    k, m = np.argwhere(owners != 1)[0]
+    for moves in ([[i, j, 0, numbers[i, j] + 1]],  # over-committed
+                  [[k, m, 0, 0]],  # unowned
+                  [[i, j, 0, -1]],  # negative
+                  [[6, j, 0, 1]]):  # out of bounds
+        assert not board.push(1, np.array(moves)), "invalid moves accepted"
+        assert (board.owners == owners).all(), "owners changed"
+        assert (board.numbers == numbers).all(), "numbers changed"
+        board.pop()
+    # update_board only rejects negative totals, so these are fine
+    moves = np.array([[i, j, 0, 1], [i, j, 0, -1]])
+    assert board.push(1, moves), "valid negative move rejected"
+    engine_owners, engine_numbers = np.array(owners), np.array(numbers)
+    g17.update_board(1, moves, engine_owners, engine_numbers)
+    assert (board.owners == engine_owners).all(), "owners differ from engine"
+    assert (board.numbers == engine_numbers).all(), \
+        "numbers differ from engine"
+    board.pop()
+    assert not board.push(1, np.array([[i, j, 0, 1], [i, j, 1, -1]])), \
+        "negative total accepted"
+    board.pop()
+
+
+def test_narrow_push():
+    owners = np.zeros((14, 14), dtype=int)
+    owners[13, 13] = 1
+    numbers = np.ones((14, 14), dtype=int)
+    for dtype in np.int8, np.int16:
+        board = SimulationBoard(owners, numbers)
+        assert board.push(1, np.array([[13, 13, 1, 1]], dtype=dtype)), \
+            f"{dtype.__name__} moves rejected"
+        assert board.numbers[13, 13] == 0 and board.numbers[0, 13] == 2, \
+            f"{dtype.__name__} moves moved the wrong pieces"
+    board = SimulationBoard(owners, numbers)
+    assert board.push(1, [(np.array([-1, -1]), 's', 1)]), \
+        "negative tuple coordinates rejected"
+    assert board.numbers[0, 13] == 2, "negative coordinates not wrapped"
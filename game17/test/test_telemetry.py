@@ -0,0 +1,48 @@
+import io
+import json
+
+from game17 import game_runners, zombie
+from game17.basic_mover import get_mover_factory
+from game17.telemetry import Progress, print_progress
+
+
+def test_progress(tmp_path):
+    snapshots = []
+    metrics_file = tmp_path / 'metrics.json'
+    progress = Progress(4, snapshots.append, metrics_file, interval=1e6)
+    progress.game_done(10)
+    progress.game_done(20, banned={3})
+    with open(metrics_file) as fh:
+        assert json.load(fh)['games completed'] == 1, \
+            "metrics written too often"
+    progress.game_done(30)
+    progress.game_done(40, failed={5})
+    with open(metrics_file) as fh:
+        metrics = json.load(fh)
+    assert metrics['games completed'] == 4, "final metrics not written"
+    assert metrics['banned'] == [3], "bans not reported"
+    assert metrics['failed'] == [5], "failures not reported"
+    assert [s['games completed'] for s in snapshots] == [1, 2, 3, 4]
+    assert snapshots[-1]['eta'] == 0, "bad ETA"
+    out = io.StringIO()
+    print_progress(snapshots[1], out)
+    assert '2/4 games' in out.getvalue(), "bad progress line"
+    assert 'failed' not in out.getvalue(), "no failures to report"
+    print_progress(snapshots[-1], out)
+    assert 'failed: 5' in out.getvalue(), "failures not printed"
+
+
+def test_runner_progress(tmp_path):
+    snapshots = []
+    movers = {1: get_mover_factory(zombie.make_moves),
+              2: get_mover_factory(zombie.make_moves)}
+    game_runners.battle_royale(movers, tmp_path, num_games=3, board_size=3,
+                               num_rounds=2, time_threshold=-1,
+                               progress=snapshots.append)
+    assert len(snapshots) == 3, "battle royale progress not reported"
+    assert snapshots[-1]['turns/s'] > 0, "turns not counted"
+    game_runners.vs_zombies({0: movers[1]}, num_games=2, board_size=3,
+                            num_rounds=2, progress=snapshots.append,
+                            metrics_file=tmp_path / 'metrics.json')
+    assert len(snapshots) == 5, "vs zombies progress not reported"
+    assert (tmp_path / 'metrics.json').exists(), "metrics not written"
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from game17 import backends, verification
+
+
+class MissCaptures(backends.NumpyBackend):
+    'Backend that fails to take the last empty square a player moves into'
+
+    def update_board(self, owner, moves, owners, numbers, rng=np.random):
+        before = owners.copy()
+        empty = numbers == 0
+        super().update_board(owner, moves, owners, numbers, rng)
+        captured = np.flatnonzero((before != owners) & empty)
+        if len(captured):
+            owners.flat[captured[-1]] = before.flat[captured[-1]]
+
+
+def test_random_moves():
+    rng = np.random.default_rng(0)
+    messages = set()
+    for _ in range(200):
+        owners, numbers = verification.random_board(6, 3, rng)
+        moves = verification.random_moves(1, owners, numbers, rng)
+        _, printed = verification._run(lambda: backends.NumpyBackend(
+            ).update_board(1, moves, owners, numbers))
+        messages.add(printed.split(': ')[-1].strip())
+    assert len(messages) == 5, f"not every skip rule tested: {messages}"
+
+
+def test_verify_same():
+    assert verification.verify('numpy', 'numpy', num_cases=20,
+                               num_games=2) == [], "numpy differs from itself"
+
+
+def test_verify_divergence():
+    divergences = verification.verify(
+        'numpy', MissCaptures(), num_cases=20, num_games=2, board_size=6)
+    assert {d.check for d in divergences} == \
+        {'update_board', 'zombie_turn', 'game'}, "divergences missed"
+    game = [d for d in divergences if d.check == 'game'][0]
+    assert game.turn is not None and str(game.turn) in str(game), \
+        "turn not reported"
+    turn, _ = verification.check_game(
+        backends.NumpyBackend(), MissCaptures(), game.seed, 6, 30)
+    assert turn == game.turn, "divergence not reproducible from its seed"
+
+
+def test_verify_numba():
+    pytest.importorskip('numba')
+    assert verification.verify('numpy', 'numba', num_cases=50,
+                               num_games=3) == [], "numba backend differs"
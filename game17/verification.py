@@ -0,0 +1,318 @@
+"""
+Check that a faster game engine plays exactly the same games as the
+reference one.
+
+The candidate backend and the reference backend are given the same boards,
+the same moves and identically seeded random number generators, and
+everything they produce is compared: the boards after each call, skip
+messages, exceptions, diffs and owned pieces. Moves are random and are
+often invalid in one of the ways the skip rules catch (squares off the
+board, unowned squares, moving more pieces than owned, negative counts).
+Whole seeded games are then played with each backend, between zombies and
+players that make such moves, and their records compared turn by turn.
+"""
+
+import contextlib
+import io
+
+import numpy as np
+
+from .backends import get_backend
+from .game17 import DIRECTIONS, board_dtypes
+from .game_runners import game17
+
+
+class Divergence(object):
+    """
+    Where a candidate backend first disagreed with the reference.
+
+    Attributes
+    ----------
+    check : str
+        What was being compared: 'update_board', 'zombie_turn' or 'game'.
+    case : int
+        Number of the case (or game) within the check.
+    seed : tuple of ints
+        Seed that reproduces the case.
+    turn : int or None
+        For games, the first turn that differed, counting from 0.
+    detail : str
+        What differed.
+
+    """
+
+    def __init__(self, check, case, seed, detail, turn=None):
+        self.check = check
+        self.case = case
+        self.seed = seed
+        self.detail = detail
+        self.turn = turn
+
+    def __str__(self):
+        turn = '' if self.turn is None else f', turn {self.turn}'
+        return (f'{self.check} case {self.case} (seed {self.seed}{turn}): '
+                f'{self.detail}')
+
+
+def random_board(board_size, num_players, rng):
+    'Board part way through a game, shared randomly between a few players'
+    owner_dtype, number_dtype = board_dtypes(board_size)
+    shape = (board_size, board_size)
+    owners = rng.integers(num_players, size=shape).astype(owner_dtype)
+    numbers = rng.integers(0, 10, size=shape).astype(number_dtype)
+    return owners, numbers
+
+
+def random_moves(owner, owners, numbers, rng, invalid=0.25):
+    """
+    Random array moves for owner, from about half of its squares, which
+    sometimes move more pieces in total than a square holds. With
+    probability invalid, one move is broken in a way that a skip rule
+    catches. The moves are in a random integer dtype, as narrow as int8.
+    """
+    dtype = rng.choice([np.int8, np.int16, np.int32, np.int64])
+    board_size = owners.shape[0]
+    squares = np.argwhere((owners == owner) & (numbers > 0))
+    squares = squares[rng.random(len(squares)) < 0.5]
+    if len(squares) and rng.random() < 0.2:
+        squares = np.concatenate((squares, squares[:1]))
+    moves = np.empty((len(squares), 4), dtype=np.int64)
+    moves[:, :2] = squares
+    moves[:, 2] = rng.integers(len(DIRECTIONS), size=len(squares))
+    moves[:, 3] = rng.integers(numbers[squares[:, 0], squares[:, 1]] + 1)
+    if rng.random() >= invalid:
+        return moves.astype(dtype)
+    move = [rng.integers(board_size), rng.integers(board_size),
+            rng.integers(len(DIRECTIONS)), 1]
+    owned = np.argwhere(owners == owner)
+    unowned = np.argwhere(owners != owner)
+    kind = rng.integers(4)
+    if kind == 0:
+        column = rng.integers(3)
+        move[column] = rng.choice(
+            [-1, len(DIRECTIONS) if column == 2 else board_size])
+    elif kind == 1 and len(unowned):
+        move[:2] = unowned[rng.integers(len(unowned))]
+    elif kind == 2 and len(owned):
+        move[:2] = owned[rng.integers(len(owned))]
+        move[3] = numbers[tuple(move[:2])] + 1
+    elif len(owned):
+        move[:2] = owned[rng.integers(len(owned))]
+        move[3] = -1
+    return np.insert(moves, rng.integers(len(moves) + 1), move,
+                     axis=0).astype(dtype)
+
+
+def as_tuples(moves):
+    'The same moves as a list of (square, direction, number) tuples'
+    return [(np.array([i, j]), DIRECTIONS[d % len(DIRECTIONS)], n)
+            for i, j, d, n in moves]
+
+
+def _run(call):
+    'Result of call, or the exception it raised, and what it printed'
+    printed = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(printed):
+            result = call()
+    except Exception as err:
+        result = f'{type(err).__name__}: {err}'
+    return result, printed.getvalue()
+
+
+def _compare_arrays(name, reference, candidate):
+    if not isinstance(reference, np.ndarray) or \
+            not isinstance(candidate, np.ndarray):
+        if str(reference) != str(candidate):
+            return f'{name} {reference!r} != {candidate!r}'
+        return None
+    if reference.dtype != candidate.dtype:
+        return f'{name} dtype {reference.dtype} != {candidate.dtype}'
+    if reference.shape != candidate.shape or \
+            not np.array_equal(reference, candidate):
+        return f'{name} differ:\n{reference}\n!=\n{candidate}'
+    return None
+
+
+def _compare_turns(backends, owner, owners, numbers, turn):
+    """
+    Play turn(backend, owners, numbers) on a copy of the board with each
+    backend and describe the first difference, if any.
+    """
+    outcomes = []
+    for backend in backends:
+        after_owners, after_numbers = owners.copy(), numbers.copy()
+        result, printed = _run(
+            lambda: turn(backend, after_owners, after_numbers))
+        outcomes.append((
+            ('result', result),
+            ('printed', printed),
+            ('owners', after_owners),
+            ('numbers', after_numbers),
+            ('owners diff',
+             _run(lambda: backend.board_diff(owners, after_owners))[0]),
+            ('numbers diff',
+             _run(lambda: backend.board_diff(numbers, after_numbers))[0]),
+            ('owned pieces', _run(lambda: backend.find_owned_pieces(
+                owner, after_owners, after_numbers))[0])))
+    for (name, reference), (_, candidate) in zip(*outcomes):
+        detail = _compare_arrays(name, reference, candidate)
+        if detail is not None:
+            return detail
+    return None
+
+
+def check_update_board(reference, candidate, seed, max_board_size=14):
+    'Compare update_board on a random board and moves (None if the same)'
+    rng = np.random.default_rng(seed)
+    board_size = rng.integers(2, max_board_size + 1)
+    owners, numbers = random_board(board_size, rng.integers(1, 5), rng)
+    owner = owners.flat[0]
+    moves = random_moves(owner, owners, numbers, rng)
+    if rng.random() < 0.25:
+        moves = as_tuples(moves)
+    tie_seed = rng.integers(2**32)
+
+    def turn(backend, owners, numbers):
+        backend.update_board(owner, moves, owners, numbers,
+                             np.random.default_rng(tie_seed))
+    return _compare_turns(
+        (reference, candidate), owner, owners, numbers, turn)
+
+
+def check_zombie_turn(reference, candidate, seed, max_board_size=14):
+    'Compare zombie_turn on a random board (None if the same)'
+    rng = np.random.default_rng(seed)
+    board_size = rng.integers(2, max_board_size + 1)
+    owners, numbers = random_board(board_size, rng.integers(1, 5), rng)
+    owner = owners.flat[0]
+    rounds_left = rng.integers(50)
+    zombie_seed, tie_seed = rng.integers(2**32, size=2)
+    # zombies draw differently from the legacy RandomState, so check both
+    generator = np.random.RandomState if rng.random() < 0.25 else \
+        np.random.default_rng
+
+    def turn(backend, owners, numbers):
+        backend.zombie_turn(owner, rounds_left, owners, numbers,
+                            generator(zombie_seed), generator(tie_seed))
+    return _compare_turns(
+        (reference, candidate), owner, owners, numbers, turn)
+
+
+def chaos_player(seed):
+    """
+    get_mover function for players that make random, often invalid, moves,
+    the same ones in every game with the same seed.
+    """
+    def get_mover(owner, owners, numbers, turn_order, num_rounds):
+        rng = np.random.default_rng((*seed, int(owner)))
+
+        def mover(owners, numbers):
+            moves = random_moves(owner, owners, numbers, rng)
+            return as_tuples(moves) if rng.random() < 0.25 else moves
+        return mover
+    return get_mover
+
+
+def check_game(reference, candidate, seed, board_size=8, num_rounds=30,
+               num_players=3):
+    """
+    Play a seeded game between zombies and chaos players with each backend
+    and compare the records.
+
+    Returns
+    -------
+    turn : int or None
+        First turn that differed, or None if the games were the same.
+    detail : str or None
+        What differed.
+
+    """
+    players = {owner: chaos_player(seed) for owner in range(num_players)}
+    games = [_run(lambda: game17(players, board_size, num_rounds, seed,
+                                 backend))
+             for backend in (reference, candidate)]
+    (reference_game, reference_printed), (candidate_game,
+                                          candidate_printed) = games
+    if isinstance(reference_game, str) or isinstance(candidate_game, str):
+        if reference_game != candidate_game:
+            return 0, f'result {reference_game!r} != {candidate_game!r}'
+        return None, None
+    reference_record, candidate_record = reference_game[2], candidate_game[2]
+    for name in 'owners', 'numbers':
+        detail = _compare_arrays(f'starting {name}', reference_record[name],
+                                 candidate_record[name])
+        if detail is not None:
+            return 0, detail
+    for turn, (reference_diff, candidate_diff) in enumerate(zip(
+            reference_record['diffs'], candidate_record['diffs'])):
+        where = (f"round {reference_diff['round']}, "
+                 f"player {reference_diff['owner']}: ")
+        for key in 'round', 'owner', 'owners', 'numbers':
+            detail = _compare_arrays(
+                key, np.asarray(reference_diff[key]),
+                np.asarray(candidate_diff[key]))
+            if detail is not None:
+                return turn, where + detail
+    turns = min(len(reference_record['diffs']),
+                len(candidate_record['diffs']))
+    if len(reference_record['diffs']) != len(candidate_record['diffs']):
+        return turns, (f"reference played {len(reference_record['diffs'])}"
+                       f" turns, candidate {len(candidate_record['diffs'])}")
+    if reference_printed != candidate_printed:
+        return None, 'skip messages differ'
+    if reference_game[0] != candidate_game[0]:
+        return None, 'scores differ'
+    return None, None
+
+
+def verify(reference='numpy', candidate='auto', num_cases=200, num_games=10,
+           board_size=14, num_rounds=30, seed=0):
+    """
+    Check that candidate plays exactly the same games as reference.
+
+    Parameters
+    ----------
+    reference : str or backend object, optional
+        Reference backend (see game17.backends). The default is 'numpy'.
+    candidate : str or backend object, optional
+        Backend to check. The default is 'auto'.
+    num_cases : int, optional
+        Number of random boards on which to compare update_board, and
+        again zombie_turn. The default is 200.
+    num_games : int, optional
+        Number of whole games to compare. The default is 10.
+    board_size : int, optional
+        Size of the board in games, and the largest random board. The
+        default is 14, the size of a real game, which is big enough for the
+        flat indices of narrow moves to overflow.
+    num_rounds : int, optional
+        Number of rounds in each game. The default is 30.
+    seed : int, optional
+        Seed for the whole check. The default is 0.
+
+    Returns
+    -------
+    list of Divergence
+        The first difference found in each case and game that differed.
+        Empty if the backends agreed on everything.
+
+    """
+    backends = get_backend(reference), get_backend(candidate)
+    divergences = []
+    for key, (check, compare) in enumerate([
+            ('update_board', check_update_board),
+            ('zombie_turn', check_zombie_turn)]):
+        for case in range(num_cases):
+            case_seed = (seed, key, case)
+            detail = compare(*backends, case_seed, board_size)
+            if detail is not None:
+                divergences.append(Divergence(check, case, case_seed, detail))
+    for case in range(num_games):
+        case_seed = (seed, 2, case)
+        turn, detail = check_game(*backends, case_seed, board_size,
+                                  num_rounds)
+        if detail is not None:
+            divergences.append(
+                Divergence('game', case, case_seed, detail, turn))
+    return divergences
@@ -3,7 +3,8 @@ import numpy as np
 from .game17 import find_owned_pieces
 
 
-def make_moves(owner, rounds_left, owners, numbers):
+def make_moves(owner, rounds_left, owners, numbers, view=None,
+               rng=np.random):
     """
     Zombie mover. Moves each owned piece in a random direction.
 
@@ -17,6 +18,10 @@ def make_moves(owner, rounds_left, owners, numbers):
         Current owner of each square.
     numbers : square array of ints
         Current number of pieces in each square.
+    view : GameView, optional
+        Cached features of the current board.
+    rng : numpy Generator or RandomState, optional
+        Source of randomness. The default is numpy.random.
 
     Returns
     -------
@@ -27,12 +32,15 @@ def make_moves(owner, rounds_left, owners, numbers):
         number of pieces to move.
 
     """
-    owned_pieces = find_owned_pieces(owner, owners, numbers)
+    if view is None:
+        owned_pieces = find_owned_pieces(owner, owners, numbers)
+    else:
+        owned_pieces = view.owned_pieces(owner)
     moves = []
     for pieces in owned_pieces:
         coords = pieces[:2]
         count = pieces[2]
-        to_move = np.random.multinomial(count, [0.25]*4)
+        to_move = rng.multinomial(count, [0.25]*4)
         for i in range(4):
             if to_move[i] > 0:
                 move = (coords, 'nsew'[i], to_move[i])
@@ -8,6 +8,9 @@ setup(
     install_requires=[
         'Click', 'numpy', 'pandas', 'matplotlib'
     ],
+    extras_require={
+        'numba': ['numba']
+    },
     entry_points='''
         [console_scripts]
         game17=game17.cli:cli